@@ -0,0 +1,7 @@
+"""
+Benchmarks for exploration, run against a local stand-in for a real host, and for parsing.
+
+server - An asyncssh server that serves the help text of a synthetic cli tree.
+suite - Runs explore against that server across session counts and transport modes.
+parsers - Times the parsers against a corpus of real and synthetically scaled help text.
+"""
@@ -0,0 +1,176 @@
+"""Measure how fast the parsers get through a corpus of real and synthetically scaled help text."""
+from pathlib import Path
+import re
+import timeit
+import tracemalloc
+
+from clix import plugins
+from clix.benchmark.server import SyntheticCLI
+from clix.explore import process_help
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+# the results the test suite holds the parsers to, refreshed when a change is meant to show
+BASELINE = Path(__file__).parent / "parsers-baseline.json"
+# real help text in the corpus directory, and the parser that reads it
+REAL_PAGES = {
+    "hammer-host": "hammer",
+    "hammer-host-create": "hammer",
+    "argparse": "argparse",
+    "subscription-manager": "subscription-manager",
+}
+THRESHOLD = 0.25
+# a fixed workload, timed alongside each page, so results are comparable across runs
+REFERENCE_TEXT = "  --reference-option VALUE     A row of help text to scan.\n" * 200
+REFERENCE_PATTERN = re.compile(r"--(?P<name>\S+)")
+
+
+def _reference():
+    names = [match["name"] for match in REFERENCE_PATTERN.finditer(REFERENCE_TEXT)]
+    return names, [row.split() for row in REFERENCE_TEXT.splitlines()]
+
+
+def _multiline_options(count, lines=4):
+    """Hammer style help text whose options each have a description wrapped over several lines"""
+    rows = ["Usage:", "    hammer host update [OPTIONS]", "", "Options:"]
+    for index in range(count):
+        rows.append(f" --option{index} VALUE{index}{' ' * 20}Set the value of option {index}.")
+        rows.extend(
+            f"{' ' * 43}Comma separated list of values, continued on line {line}."
+            for line in range(1, lines)
+        )
+    rows.append(" -h, --help                                Print help")
+    return "\n".join(rows) + "\n"
+
+
+def _scaled(text, times):
+    """Repeat a real page's option rows, renamed so every copy is a distinct option"""
+    head, _, options = text.partition("Options:\n")
+    copies = [options.replace(" --", f" --copy{index}-") for index in range(times)]
+    return f"{head}Options:\n{''.join(copies)}"
+
+
+def load_corpus():
+    """Return a list of (page name, parser name, help text) to benchmark"""
+    pages = [
+        (name, parser, (CORPUS_DIR / f"{name}.txt").read_text())
+        for name, parser in REAL_PAGES.items()
+    ]
+    create = pages[1][2]
+    pages.extend(
+        [
+            ("hammer-host-create-x20", "hammer", _scaled(create, 20)),
+            ("hammer-multiline-options", "hammer", _multiline_options(1000)),
+            (
+                "hammer-huge-options",
+                "hammer",
+                SyntheticCLI("hammer", "hammer", depth=0, options=5000).help_text(["hammer"]),
+            ),
+            (
+                "argparse-wide",
+                "argparse",
+                SyntheticCLI("demo", "argparse", depth=1, fanout=1000, options=1000).help_text(
+                    ["demo"]
+                ),
+            ),
+            (
+                "subscription-manager-padded",
+                "subscription-manager",
+                SyntheticCLI(
+                    "subscription-manager",
+                    "subscription-manager",
+                    depth=1,
+                    fanout=200,
+                    options=200,
+                    help_size=256 * 1024,
+                ).help_text(["subscription-manager"]),
+            ),
+        ]
+    )
+    return pages
+
+
+def measure(parser, text, repeat=5):
+    """Return pages/sec, MB/sec, speed relative to the reference, and peak KiB allocated
+
+    Throughput is the best of several timed runs, each long enough to be measurable.
+    Machine speed drifts between runs, so the relative speed, parsing compared with
+    a fixed reference workload timed right alongside it, is what gets compared.
+    Allocation is measured on a separate run, since tracing slows parsing down.
+    """
+    timer, reference = timeit.Timer(lambda: process_help(parser, text)), timeit.Timer(_reference)
+    number, reference_number = timer.autorange()[0], reference.autorange()[0]
+    seconds, reference_seconds = float("inf"), float("inf")
+    # interleaved, so both see the same conditions
+    for _ in range(repeat):
+        reference_seconds = min(reference_seconds, reference.timeit(reference_number))
+        seconds = min(seconds, timer.timeit(number))
+    seconds, reference_seconds = seconds / number, reference_seconds / reference_number
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    process_help(parser, text)
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return (
+        1 / seconds,
+        len(text.encode()) / seconds / 2**20,
+        reference_seconds / seconds,
+        peak / 1024,
+    )
+
+
+def benchmark_page(name, parser_name, text, repeat=5):
+    """Parse a page with the named parser, and return what we measured"""
+    parser = plugins.load_parser(parser_name)()
+    sub_commands, options, _ = process_help(parser, text)
+    pages_per_sec, mb_per_sec, relative_speed, alloc_kib = measure(parser, text, repeat)
+    return {
+        "page": name,
+        "parser": parser_name,
+        "bytes": len(text.encode()),
+        "sub_commands": len(sub_commands),
+        "options": len(options),
+        "pages_per_sec": pages_per_sec,
+        "mb_per_sec": mb_per_sec,
+        "relative_speed": relative_speed,
+        "alloc_kib": alloc_kib,
+    }
+
+
+def run_suite(parsers=None, repeat=5):
+    """Benchmark every page in the corpus, or only those read by the given parsers"""
+    return [
+        benchmark_page(name, parser_name, text, repeat)
+        for name, parser_name, text in load_corpus()
+        if not parsers or parser_name in parsers
+    ]
+
+
+def find_regressions(rows, baseline, threshold=THRESHOLD):
+    """Compare results against a baseline run, and describe each page that got worse
+
+    A page regresses when its relative speed drops, or its allocations grow, by more than
+    the threshold. Finding a different number of sub commands or options also counts,
+    since a faster parser that reads help text differently isn't an improvement.
+    """
+    previous = {row["page"]: row for row in baseline}
+    regressions = []
+    for row in rows:
+        if not (old := previous.get(row["page"])):
+            continue
+        page = row["page"]
+        if row["relative_speed"] < old["relative_speed"] * (1 - threshold):
+            regressions.append(
+                f"{page}: {row['relative_speed']:.3f}x the reference speed, "
+                f"down from {old['relative_speed']:.3f}x"
+            )
+        if row["alloc_kib"] > old["alloc_kib"] * (1 + threshold):
+            regressions.append(
+                f"{page}: {row['alloc_kib']:.1f} KiB allocated, up from {old['alloc_kib']:.1f}"
+            )
+        regressions.extend(
+            f"{page}: found {row[key]} {key}, instead of {old[key]}"
+            for key in ("sub_commands", "options")
+            if row[key] != old[key]
+        )
+    return regressions
@@ -0,0 +1,161 @@
+"""A local asyncssh server that stands in for a real host, serving a synthetic cli tree."""
+import argparse
+import asyncio
+import json
+import shlex
+import sys
+
+import asyncssh
+
+from clix import runner
+
+STATS_CMD = "clix-benchmark-stats"
+STYLES = ("hammer", "argparse", "subscription-manager")
+# what the server has seen, reported to the benchmark by STATS_CMD
+STATS = {"connections": 0, "sessions": 0, "peak_sessions": 0, "commands": 0}
+
+
+class SyntheticCLI:
+    """A cli tree of a given depth and fan-out, with help text in one of the parsers' formats
+
+    Every command below the top level is named sub<N>, and every command has `options`
+    options. Help text is padded with description lines up to roughly `help_size` bytes.
+    """
+
+    def __init__(self, name="hammer", style="hammer", depth=3, fanout=5, options=5, help_size=0):
+        self.name = name
+        self.style = style
+        self.depth = depth
+        self.fanout = fanout
+        self.options = options
+        self.help_size = help_size
+
+    @property
+    def node_count(self):
+        return sum(self.fanout**level for level in range(self.depth + 1))
+
+    def sub_commands(self, path):
+        """Return the sub commands of a path, or None if the path isn't in the tree"""
+        if not path or path[0] != self.name:
+            return None
+        for part in path[1:]:
+            if not part.startswith("sub") or part[3:] not in map(str, range(self.fanout)):
+                return None
+        if len(path) > self.depth + 1:
+            return None
+        return [f"sub{i}" for i in range(self.fanout)] if len(path) <= self.depth else []
+
+    def _option_lines(self):
+        lines = [" -h, --help                    Print help"]
+        lines.extend(
+            f" --option{i} OPTION{i}             Set option {i}" for i in range(self.options)
+        )
+        return lines
+
+    def help_text(self, path):
+        """Render the help text of a command, or None if it doesn't exist"""
+        sub_commands = self.sub_commands(path)
+        if sub_commands is None:
+            return None
+        command = " ".join(path)
+        if self.style == "subscription-manager":
+            lines = [f"Usage: {command} MODULE-NAME [MODULE-OPTIONS] [--help]", ""]
+            lines.extend(["Options:", *self._option_lines()])
+            if sub_commands:
+                # the subman parser reads modules until the end of the help text
+                lines.extend(["", "Primary Modules:", ""])
+                lines.extend(f"  {sub:<15}Run {sub}" for sub in sub_commands)
+        else:
+            lines = [f"Usage:\n    {command} [OPTIONS] SUBCOMMAND [ARG] ...", "", "Options:"]
+            lines.extend(self._option_lines())
+            if sub_commands:
+                lines.extend(["", "Subcommands:"])
+                lines.extend(f" {sub:<30}Run {sub}" for sub in sub_commands)
+        text = "\n".join(lines) + "\n"
+        # pad with the kind of description lines the parsers skip over
+        options_at = text.index("Options:\n") + len("Options:\n")
+        filler = "                               More about this command.\n"
+        padding = filler * max((self.help_size - len(text)) // len(filler), 0)
+        return text[:options_at] + padding + text[options_at:]
+
+
+class StandInServer(asyncssh.SSHServer):
+    """Accept any login, and count connections for the benchmark's stats"""
+
+    def connection_made(self, conn):
+        STATS["connections"] += 1
+
+    def begin_auth(self, username):
+        return False
+
+
+def process_factory(cli, delay):
+    """Build a session handler that answers help commands from the synthetic cli"""
+
+    async def handle(process):
+        stats = STATS
+        if process.command == STATS_CMD:
+            process.stdout.write(json.dumps(stats) + "\n")
+            stats["peak_sessions"] = stats["sessions"]  # so each benchmark run sees its own peak
+            process.exit(0)
+            return
+        stats["commands"] += 1
+        stats["sessions"] += 1
+        stats["peak_sessions"] = max(stats["peak_sessions"], stats["sessions"])
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            parts = shlex.split(process.command or "")
+            help_text = None
+            if parts and parts[-1] == "--help":
+                help_text = cli.help_text(parts[:-1])
+            if help_text is None:
+                process.stderr.write(f"Unknown command: {process.command}\n")
+                process.exit(64)
+            else:
+                process.stdout.write(help_text)
+                process.exit(0)
+        finally:
+            stats["sessions"] -= 1
+
+    return handle
+
+
+async def serve(cli, delay=0.0, host="127.0.0.1", port=0):
+    """Start the stand-in server, returning it once it's listening"""
+    return await asyncssh.create_server(
+        StandInServer,
+        host,
+        port,
+        server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+        process_factory=process_factory(cli, delay),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--name", default="hammer")
+    parser.add_argument("--style", choices=STYLES, default="hammer")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--options", type=int, default=5)
+    parser.add_argument("--help-size", type=int, default=0)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    cli = SyntheticCLI(
+        args.name, args.style, args.depth, args.fanout, args.options, args.help_size
+    )
+
+    async def run():
+        server = await serve(cli, args.delay, port=args.port)
+        # let whoever started us know where to connect
+        sys.stdout.write(f"{server.sockets[0].getsockname()[1]}\n")
+        sys.stdout.flush()
+        await server.wait_closed()
+
+    runner.run(run())
+
+
+if __name__ == "__main__":
+    main()
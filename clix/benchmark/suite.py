@@ -0,0 +1,137 @@
+"""Measure how fast explore crawls a synthetic cli, served by a local stand-in server."""
+import json
+import math
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import asyncssh
+from logzero import logger
+
+from clix import runner
+from clix.benchmark.server import STATS_CMD
+from clix.explore import AsyncExplorer
+
+MODES = ("ssh", "adaptive", "replay")
+SESSIONS = (1, 5, 10, 20)
+CREDENTIALS = {"user": "clix", "password": "clix"}  # the stand-in accepts anything
+
+
+class ServerProcess:
+    """Run the stand-in server in its own process, so it doesn't compete for our event loop"""
+
+    def __init__(self, delay=0.0, **tree):
+        self.args = [f"--{key.replace('_', '-')}={val}" for key, val in tree.items()]
+        self.args.append(f"--delay={delay}")
+        self.proc = None
+        self.port = None
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "clix.benchmark.server", *self.args],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.port = int(self.proc.stdout.readline())
+        logger.debug(f"Stand-in server listening on port {self.port}")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.proc.terminate()
+        self.proc.wait()
+
+    def stats(self):
+        """Ask the server how many connections and sessions it has seen"""
+
+        async def fetch():
+            async with asyncssh.connect(
+                "127.0.0.1", self.port, known_hosts=None, username=CREDENTIALS["user"]
+            ) as conn:
+                return json.loads((await conn.run(STATS_CMD, check=True)).stdout)
+
+        return runner.run(fetch())
+
+
+def run_once(server, parser, mode, sessions, data_dir, archive, trace=False):
+    """Explore the stand-in server once, and return what we measured"""
+    explorer = AsyncExplorer(
+        name=parser,
+        version=f"benchmark-{mode}-{sessions}",
+        host="127.0.0.1",
+        port=server.port,
+        parser=parser,
+        max_sessions=sessions,
+        pool_size=math.ceil(sessions / 10),
+        adjust_max=False,
+        adaptive=mode == "adaptive",
+        replay=archive if mode == "replay" else None,
+        data_dir=data_dir,
+        **CREDENTIALS,
+    )
+    before = server.stats()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    explorer.explore()
+    seconds = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1] if trace else None
+    tracemalloc.stop()
+    after = server.stats()
+    nodes = len(explorer.telemetry.commands)
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_sec": nodes / seconds if seconds else 0.0,
+        "peak_memory_mb": peak_memory / 2**20 if trace else None,
+        "connections": after["connections"] - before["connections"] - 1,  # our stats probe
+        "peak_sessions": after["peak_sessions"],
+    }
+
+
+def run_suite(
+    style="hammer",
+    depth=3,
+    fanout=5,
+    options=5,
+    help_size=0,
+    delay=0.0,
+    sessions=SESSIONS,
+    modes=MODES,
+    memory=True,
+):
+    """Explore a synthetic cli across session counts and transport modes
+
+    A first, recorded crawl warms everything up and provides the archive for replay runs.
+    Peak memory is measured in a separate run per combination, since tracing slows
+    the crawl down. Connection and session counts come from the server's point of view.
+    """
+    tree = {"name": style, "style": style, "depth": depth, "fanout": fanout}
+    tree.update(options=options, help_size=help_size)
+    rows = []
+    with ServerProcess(delay=delay, **tree) as server, tempfile.TemporaryDirectory() as tmp:
+        data_dir, archive = f"{tmp}/", Path(tmp, "benchmark.jsonl.gz")
+        AsyncExplorer(
+            name=style,
+            version="benchmark-warmup",
+            host="127.0.0.1",
+            port=server.port,
+            parser=style,
+            adjust_max=False,
+            record=archive,
+            data_dir=data_dir,
+            **CREDENTIALS,
+        ).explore()
+        for mode in modes:
+            for count in sessions:
+                logger.info(f"Benchmarking {mode} with {count} sessions")
+                row = run_once(server, style, mode, count, data_dir, archive)
+                if memory:
+                    traced = run_once(server, style, mode, count, data_dir, archive, trace=True)
+                    row["peak_memory_mb"] = traced["peak_memory_mb"]
+                rows.append(row)
+    return rows
@@ -0,0 +1,58 @@
+"""A content-addressed, on-disk cache of raw help output, shared across explorations."""
+import hashlib
+from pathlib import Path
+import shlex
+from uuid import uuid4
+
+from logzero import logger
+
+FINGERPRINT_CMD = (
+    "(rpm -qa 2>/dev/null | grep -i -- {name} | sort | grep .) "
+    '|| sha256sum "$(command -v {name})"'
+)
+
+
+def fingerprint_command(cli_name, fingerprint_cmd=None):
+    """Build the shell command whose output identifies the installed cli build"""
+    script = (fingerprint_cmd or FINGERPRINT_CMD).format(name=shlex.quote(cli_name))
+    return f"sh -c {shlex.quote(script)}"
+
+
+class HelpCache:
+    """Store the stdout of help commands, keyed by cli name, command, and build fingerprint
+
+    Any change to the installed packages changes the fingerprint,
+    so stale entries are never served, just left behind.
+    """
+
+    def __init__(self, cache_dir, cli_name, fingerprint):
+        self.cache_dir = Path(cache_dir)
+        self.cli_name = cli_name
+        self.fingerprint = hashlib.sha256(fingerprint.encode()).hexdigest()
+        self.hits = self.misses = 0
+
+    def _path(self, command):
+        key = hashlib.sha256(
+            "\0".join([self.cli_name, self.fingerprint, command]).encode()
+        ).hexdigest()
+        return self.cache_dir / key[:2] / key
+
+    def get(self, command):
+        """Return the cached output of a command, or None if we haven't seen it"""
+        c_path = self._path(command)
+        if not c_path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return c_path.read_text()
+
+    def put(self, command, stdout):
+        """Save a command's output, replacing the file atomically for concurrent runs"""
+        c_path = self._path(command)
+        c_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = c_path.with_name(f"{c_path.name}.{uuid4().hex}.tmp")
+        tmp_path.write_text(stdout)
+        tmp_path.replace(c_path)
+
+    def report(self):
+        logger.info(f"Help cache: {self.hits} hits, {self.misses} misses.")
@@ -0,0 +1,184 @@
+"""A persistent index of the saved CLIs and their versions, so listing them needn't rescan."""
+from datetime import datetime, timezone
+import hashlib
+import json
+from pathlib import Path
+from uuid import uuid4
+
+from logzero import logger
+
+from clix import helpers
+
+UTC = timezone.utc  # noqa: UP017 - datetime.UTC is newer than python 3.10
+FORMAT = 1
+# hidden, like everything else clix keeps among the clis, so it isn't taken for one
+CATALOG_DIR = ".catalog"
+_CATALOGS = {}  # root => Catalog, reused while the file on disk is unchanged
+
+
+def count_nodes(tree):
+    """Count the commands in an explored tree, the cli itself included"""
+    sub_commands = tree.get("sub_commands") if isinstance(tree, dict) else None
+    return 1 + sum(count_nodes(sub) for sub in (sub_commands or {}).values())
+
+
+def is_version_file(name):
+    """Whether a file in a cli's directory holds an explored version, not a diff or a variant
+
+    Versions are saved as yaml, or as a manifest pointing into the object store.
+    """
+    return name.endswith((".yaml", ".tree")) and "-diff." not in name and "-comp." not in name
+
+
+class Catalog:
+    """Saved versions of each cli, kept newest first, along with some facts about each
+
+    The index lives in CLIs/.catalog/catalog.json. Saving a version adds it right away. Each cli
+    directory's mtime is recorded too, so files added or removed by hand are noticed
+    with a single stat, and only the files that changed are read again.
+    """
+
+    def __init__(self, data_dir=None, mock=False):
+        self.data_dir = data_dir
+        self.mock = mock
+        self.root = Path(f"{data_dir}tests/CLIs" if mock else f"{data_dir}CLIs")
+        self.path = self.root / CATALOG_DIR / "catalog.json"
+        self._mtime = None
+        self._data = {"format": FORMAT, "clis": None, "versions": {}}
+        self._read()
+
+    @classmethod
+    def open(cls, data_dir=None, mock=False):
+        """Return the catalog for a data directory, reusing one already read if it's current"""
+        root = Path(f"{data_dir}tests/CLIs" if mock else f"{data_dir}CLIs").absolute()
+        catalog = _CATALOGS.get(root)
+        if catalog is None:
+            catalog = _CATALOGS[root] = cls(data_dir, mock)
+        else:
+            catalog._read()
+        return catalog
+
+    def _read(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError) as err:
+            logger.debug(f"Rebuilding the unreadable catalog at {self.path}: {err}")
+            return
+        if data.get("format") == FORMAT:
+            self._data, self._mtime = data, mtime
+
+    def _write(self):
+        """Replace the catalog atomically, so concurrent runs never read half of one"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(self._data, indent=1))
+        tmp_path.replace(self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def _entry(self, v_path, nodes=None, explored=None):
+        """Describe a saved version's file"""
+        raw = v_path.read_bytes()
+        stat = v_path.stat()
+        if nodes is None:
+            cli_name = v_path.parent.relative_to(self.root).as_posix()
+            tree = helpers.load_cli(cli_name, v_path.stem, self.data_dir, self.mock) or {}
+            nodes = count_nodes(next(iter(tree.values()), {}))
+        explored = explored or datetime.fromtimestamp(stat.st_mtime, UTC)
+        return {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": hashlib.sha256(raw).hexdigest(),
+            "nodes": nodes,
+            "explored": explored.isoformat(timespec="seconds"),
+        }
+
+    @staticmethod
+    def _order(entries):
+        """Sort versions newest first, or return None and the reason they couldn't be sorted"""
+        try:
+            return sorted(entries, key=helpers.LooseVersion, reverse=True), None
+        except ValueError as err:
+            return None, str(err)
+
+    def _index(self, cli_name, known=None):
+        """Return a cli's index, after catching up with any changes to its directory
+
+        known - Entries for files we've just described, which needn't be read again.
+        """
+        # a local cli's name may be a path, which is nested under the root rather than replacing it
+        c_dir = Path(f"{self.root}/{cli_name}")
+        try:
+            dir_mtime = c_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            if self._data["versions"].pop(cli_name, None):
+                self._write()
+            return None
+        index = self._data["versions"].get(cli_name)
+        if index and index["dir_mtime"] == dir_mtime:
+            return index
+        old_entries = {**(index["entries"] if index else {}), **(known or {})}
+        entries = {}
+        for v_path in c_dir.iterdir():
+            if not is_version_file(v_path.name):
+                continue
+            stat, old = v_path.stat(), old_entries.get(v_path.stem)
+            if old and (old["mtime"], old["size"]) == (stat.st_mtime_ns, stat.st_size):
+                entries[v_path.stem] = old
+            else:
+                entries[v_path.stem] = self._entry(v_path)
+        order, error = self._order(entries)
+        index = {"dir_mtime": dir_mtime, "order": order, "error": error, "entries": entries}
+        self._data["versions"][cli_name] = index
+        self._write()
+        return index
+
+    def clis(self):
+        """Return the saved cli names, in reverse order, or None if nothing's been saved"""
+        try:
+            dir_mtime = self.root.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        clis = self._data["clis"]
+        if not clis or clis["dir_mtime"] != dir_mtime:
+            names = sorted(
+                c_dir.name
+                for c_dir in self.root.iterdir()
+                if c_dir.is_dir() and not c_dir.name.startswith(".")
+            )
+            clis = self._data["clis"] = {"dir_mtime": dir_mtime, "names": names[::-1]}
+            self._write()
+        return list(clis["names"])
+
+    def versions(self, cli_name):
+        """Return a cli's saved versions, newest first, or None if there aren't any"""
+        index = self._index(cli_name)
+        if not index:
+            return None
+        if index["order"] is None:
+            logger.error(f"Encountered an invalid version number. Stopping\n{index.get('error')}")
+            return None
+        return list(index["order"])
+
+    def entry(self, cli_name, version):
+        """Return what the catalog knows about a saved version, if it's been saved"""
+        index = self._index(cli_name)
+        return index["entries"].get(version) if index else None
+
+    def record(self, cli_name, version, v_path, nodes, explored=None):
+        """Add a version that was just saved, without parsing its file again
+
+        explored - When the version was explored, if not just now, like when it's only re-saved.
+        """
+        entry = self._entry(Path(v_path), nodes, explored or datetime.now(UTC))
+        index = self._index(cli_name, known={version: entry})
+        if index["entries"].get(version) is not entry:
+            # overwriting a file in place leaves its directory's mtime alone
+            index["entries"][version] = entry
+            index["order"], index["error"] = self._order(index["entries"])
+            self._write()
@@ -1,12 +1,18 @@
 """Main module for CLIx's interface."""
+from datetime import datetime
+import json
+from pathlib import Path
+
 from rich.console import Console
 from rich.table import Table
 import rich_click as click
 
 from clix import helpers, logger
+from clix.catalog import Catalog
 from clix.diff import VersionDiff
 from clix.explore import AsyncExplorer
 from clix.libtools.libmaker import LibMaker
+from clix.objects import ObjectStore
 
 NICKS = {"sat6": "hammer", "satellite": "hammer", "subman": "subscription-manager"}
 
@@ -45,14 +51,14 @@ def cli():
     "-t",
     "--target-host",
     type=str,
-    required=True,
-    help="The target host's name (my.host.domain.com).",
+    default=None,
+    help="The target host's name (my.host.domain.com). Required by the ssh transport.",
 )
 @click.option(
     "-a",
     "--auth",
     type=str,
-    required=True,
+    default=None,
     help="The username/password for the host, sepatated by '/' (root/toor).",
 )
 @click.option(
@@ -67,15 +73,130 @@ def cli():
     "--parser",
     type=str,
     default="hammer",
-    help="The name of the parser to use when pulling data (hammer).",
+    help=(
+        "The name of the parser to use when pulling data (hammer). "
+        "Any parser registered under the clix.parsers entry point group works."
+    ),
 )
 @click.option(
     "--max-sessions",
     type=int,
     default=10,
+    help="The maximum number of concurrent sessions to open.",
+)
+@click.option(
+    "--adaptive",
+    is_flag=True,
+    help=(
+        "Adjust the number of concurrent sessions to what the host can handle, "
+        "up to --max-sessions, instead of changing the host's sshd settings."
+    ),
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=60,
+    help="Seconds to wait for a single command before giving up on it (0 waits forever).",
+)
+@click.option(
+    "--retries",
+    type=int,
+    default=2,
+    help="How many times to retry a command that timed out or hit a connection error.",
+)
+@click.option(
+    "--hedge",
+    is_flag=True,
+    help=(
+        "Send a duplicate of any command that runs longer than the 95th percentile so far, "
+        "and keep whichever answers first."
+    ),
+)
+@click.option(
+    "--batch",
+    is_flag=True,
+    help="Fetch the help text of sibling commands together, in one remote exec per batch.",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=25,
+    help="The maximum number of help commands sent in a single batch.",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["queue", "remote"]),
+    default="queue",
+    help=(
+        "How to walk the cli. 'queue' shares a frontier of commands between a fixed pool of "
+        "workers. 'remote' uploads a small crawler to the host that runs every command there "
+        "and streams the results back over a single session."
+    ),
+)
+@click.option(
+    "--order",
+    type=click.Choice(["bfs", "dfs"]),
+    default="bfs",
+    help="Whether the queue engine explores breadth-first or depth-first.",
+)
+@click.option(
+    "--max-depth",
+    type=int,
+    default=None,
+    help="Don't explore sub commands deeper than this, the base command being depth 0.",
+)
+@click.option(
+    "--remote-python",
+    type=str,
+    default="python3",
+    help="The python interpreter used to run the remote crawler on the host.",
+)
+@click.option(
+    "--pool-size",
+    type=int,
+    default=2,
+    help="The number of long-lived ssh connections to keep open.",
+)
+@click.option(
+    "--channels-per-conn",
+    type=int,
+    default=10,
+    help=(
+        "The number of concurrent sessions to multiplex over each connection. "
+        "Note that CLIx will manually set the system's MaxSessions value higher, if needed."
+    ),
+)
+@click.option(
+    "--transport",
+    type=click.Choice(["ssh", "local"]),
+    default="ssh",
+    help="How to run the cli's commands: on the target host or as local processes.",
+)
+@click.option(
+    "--exec-prefix",
+    type=str,
+    default=None,
+    help="A prefix for local commands, e.g. 'podman exec my-container'.",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Record every command and its results to a gzipped archive, for later replay.",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Serve every command from a recorded archive, instead of a real host.",
+)
+@click.option(
+    "--replay-latency",
+    type=str,
+    default=None,
     help=(
-        "The maximum number of concurrent sessions to open. "
-        "Note that CLIx will manually set the system's current value higher, if needed."
+        "How long replayed commands take: 'recorded' to match the original crawl, "
+        "or an average number of seconds. Instant by default."
     ),
 )
 @click.option(
@@ -89,10 +210,118 @@ def cli():
     is_flag=True,
     help="Strip all the extra information from the results.",
 )
-def explore(cli_name, target_host, auth, version, parser, max_sessions, data_dir, compact):
+@click.option(
+    "--stream",
+    is_flag=True,
+    help=(
+        "Keep results on disk while exploring, and write the final file a subtree at a time. "
+        "This greatly reduces memory use on large clis."
+    ),
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue an interrupted exploration, only scraping commands it didn't reach.",
+)
+@click.option(
+    "--cache",
+    "use_cache",
+    is_flag=True,
+    help="Serve help output from a local cache when the installed cli build is unchanged.",
+)
+@click.option(
+    "--fingerprint-cmd",
+    type=str,
+    default=None,
+    help=(
+        "A shell command whose output identifies the installed cli build. "
+        "Defaults to the matching rpm packages, or a hash of the cli binary."
+    ),
+)
+@click.option(
+    "-b",
+    "--baseline",
+    type=str,
+    default=None,
+    help="A previously explored version. Subtrees with unchanged help text are copied from it.",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help=(
+        "Skip crawling subtrees whose help text matches one already seen elsewhere, "
+        "e.g. plugin commands mounted in several places. The results still hold both."
+    ),
+)
+@click.option(
+    "--parse-mode",
+    type=click.Choice(["inline", "thread", "process"]),
+    default="inline",
+    help=(
+        "Where help text is parsed. A process pool keeps large help pages from "
+        "stalling the event loop while sessions are waiting on it."
+    ),
+)
+@click.option(
+    "--parse-workers",
+    type=int,
+    default=None,
+    help="How many threads or processes parse help text. Defaults to the cpu count.",
+)
+@click.option(
+    "--store",
+    is_flag=True,
+    help="Also add the results to the sqlite tree store, so they can be searched with query.",
+)
+@click.option(
+    "--objects",
+    is_flag=True,
+    help=(
+        "Save the results to the deduplicated object store, rather than as a yaml file. "
+        "Subtrees unchanged since another version take no extra space."
+    ),
+)
+def explore(
+    cli_name,
+    target_host,
+    auth,
+    version,
+    parser,
+    max_sessions,
+    adaptive,
+    timeout,
+    retries,
+    hedge,
+    batch,
+    batch_size,
+    engine,
+    order,
+    max_depth,
+    remote_python,
+    pool_size,
+    channels_per_conn,
+    transport,
+    exec_prefix,
+    record,
+    replay,
+    replay_latency,
+    data_dir,
+    compact,
+    stream,
+    resume,
+    use_cache,
+    fingerprint_cmd,
+    baseline,
+    dedupe,
+    parse_mode,
+    parse_workers,
+    store,
+    objects,
+):
     """Explore a target cli and export the findings"""
-
-    user, pword = auth.split("/")
+    if transport == "ssh" and not replay and not (target_host and auth):
+        raise click.UsageError("The ssh transport requires both --target-host and --auth.")
+    user, pword = auth.split("/") if auth else (None, None)
     explorer = AsyncExplorer(
         name=NICKS.get(cli_name, cli_name),
         version=version,
@@ -101,11 +330,279 @@ def explore(cli_name, target_host, auth, version, parser, max_sessions, data_dir
         password=pword,
         parser=NICKS.get(parser, parser),
         max_sessions=max_sessions,
+        adaptive=adaptive,
+        timeout=timeout,
+        retries=retries,
+        hedge=hedge,
+        batch=batch,
+        batch_size=batch_size,
+        engine=engine,
+        order=order,
+        max_depth=max_depth,
+        remote_python=remote_python,
+        pool_size=pool_size,
+        channels_per_conn=channels_per_conn,
+        transport=transport,
+        exec_prefix=exec_prefix,
+        record=record,
+        replay=replay,
+        replay_latency=replay_latency,
         data_dir=data_dir,
         compact=compact,
+        stream=stream,
+        resume=resume,
+        use_cache=use_cache,
+        fingerprint_cmd=fingerprint_cmd,
+        baseline=baseline,
+        dedupe=dedupe,
+        parse_mode=parse_mode,
+        parse_workers=parse_workers,
+        store=store,
+        objects=objects,
     )
     explorer.explore()
-    explorer.save_results()
+    if explorer.finished:
+        explorer.save_results()
+
+
+def _check_targets(targets, manifest, data_dir):
+    """Reject a manifest whose targets can't all be explored and saved side by side"""
+    seen = set()
+    for target in targets:
+        if not (cli_name := target.get("cli_name")):
+            raise click.UsageError(f"Every target in {manifest} needs a cli_name.")
+        version = target.get("version")
+        if version is None:
+            # they'd all be dated today, and share a journal and a results file
+            raise click.UsageError(f"The target for {cli_name} in {manifest} needs a version.")
+        if not isinstance(version, str):
+            # yaml reads 6.10 as the float 6.1, which would save over version 6.1
+            raise click.UsageError(
+                f"yaml read the version of {cli_name} in {manifest} as the number {version!r}. "
+                "Quote it, so it's kept exactly as written."
+            )
+        key = (target.get("data_dir", data_dir), NICKS.get(cli_name, cli_name), version)
+        if key in seen:
+            raise click.UsageError(f"{cli_name} {version} is listed more than once in {manifest}.")
+        seen.add(key)
+        if (
+            target.get("transport", "ssh") == "ssh"
+            and not target.get("replay")
+            and not (target.get("target_host") and target.get("auth"))
+        ):
+            raise click.UsageError(
+                f"The target for {cli_name} {version} in {manifest} uses the ssh transport, "
+                "which requires both target_host and auth."
+            )
+
+
+@cli.command("explore-many")
+@click.option(
+    "-m",
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    required=True,
+    help="A yaml file listing the targets to explore.",
+)
+@click.option(
+    "--max-total",
+    type=int,
+    default=None,
+    help="The maximum number of concurrent sessions across all targets.",
+)
+@click.option(
+    "--data-dir",
+    type=str,
+    default="./",
+    help="The base directory in which to save exports.",
+)
+def explore_many(manifest, max_total, data_dir):
+    """Explore several targets at once, as listed in a manifest
+
+    The manifest holds a list of targets, whose keys match explore's options
+    (cli_name, target_host, auth, version, parser, max_sessions, ...).
+    An optional defaults mapping applies to every target.
+    """
+    with Path(manifest).open() as m_file:
+        manifest_data = helpers.yaml_load(m_file) or {}
+    defaults = manifest_data.get("defaults", {})
+    targets = [{**defaults, **target} for target in manifest_data.get("targets", [])]
+    # every target is checked before any of them starts
+    _check_targets(targets, manifest, data_dir)
+    explorers = []
+    for target in targets:
+        cli_name = target.pop("cli_name")
+        auth = target.pop("auth", None)
+        user, pword = auth.split("/") if auth else (None, None)
+        parser = target.pop("parser", "hammer")
+        try:
+            explorers.append(
+                AsyncExplorer(
+                    name=NICKS.get(cli_name, cli_name),
+                    host=target.pop("target_host", None),
+                    user=user,
+                    password=pword,
+                    parser=NICKS.get(parser, parser),
+                    data_dir=target.pop("data_dir", data_dir),
+                    **target,
+                )
+            )
+        except TypeError as err:
+            raise click.UsageError(f"Invalid target for {cli_name} in {manifest}: {err}") from err
+    AsyncExplorer.explore_all(explorers, max_total)
+    for explorer in explorers:
+        # failed targets keep their journal, so they can be resumed
+        if explorer.finished:
+            explorer.save_results()
+
+
+@cli.command()
+@click.option(
+    "--style",
+    type=click.Choice(["hammer", "argparse", "subscription-manager"]),
+    default="hammer",
+    help="The help text format of the synthetic cli, and the parser used to explore it.",
+)
+@click.option("--depth", type=int, default=3, help="How many levels of sub commands to serve.")
+@click.option("--fanout", type=int, default=5, help="How many sub commands each command has.")
+@click.option("--options", type=int, default=5, help="How many options each command has.")
+@click.option(
+    "--help-size",
+    type=int,
+    default=0,
+    help="Pad each command's help text to roughly this many bytes.",
+)
+@click.option(
+    "--delay",
+    type=float,
+    default=0.0,
+    help="Seconds the server waits before answering each command.",
+)
+@click.option(
+    "-s",
+    "--sessions",
+    type=int,
+    multiple=True,
+    default=[1, 5, 10, 20],
+    help="A max-sessions value to benchmark. May be given more than once.",
+)
+@click.option(
+    "-m",
+    "--mode",
+    "modes",
+    type=click.Choice(["ssh", "adaptive", "replay"]),
+    multiple=True,
+    default=["ssh", "adaptive", "replay"],
+    help="A transport mode to benchmark. May be given more than once.",
+)
+@click.option("--no-memory", is_flag=True, help="Skip the extra runs that measure peak memory.")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Also save the results as json, for comparing against later runs.",
+)
+def benchmark(style, depth, fanout, options, help_size, delay, sessions, modes, no_memory, output):
+    """Benchmark explore against a local stand-in server and a synthetic cli"""
+    from clix.benchmark.suite import run_suite
+
+    rows = run_suite(
+        style=style,
+        depth=depth,
+        fanout=fanout,
+        options=options,
+        help_size=help_size,
+        delay=delay,
+        sessions=sessions,
+        modes=modes,
+        memory=not no_memory,
+    )
+    table = Table(title=f"Exploring a {style} cli of depth {depth} and fan-out {fanout}")
+    for column in ("Mode", "Sessions", "Nodes", "Seconds", "Nodes/sec", "Peak MiB", "Conns"):
+        table.add_column(column, style="cyan" if column == "Mode" else None)
+    table.add_column("Peak sessions")
+    for row in rows:
+        table.add_row(
+            row["mode"],
+            str(row["sessions"]),
+            str(row["nodes"]),
+            f"{row['seconds']:.2f}",
+            f"{row['nodes_per_sec']:.1f}",
+            "-" if row["peak_memory_mb"] is None else f"{row['peak_memory_mb']:.1f}",
+            str(row["connections"]),
+            str(row["peak_sessions"]),
+        )
+    console = Console()
+    console.print(table)
+    if output:
+        Path(output).write_text(json.dumps(rows, indent=2))
+        console.print(f"Saved benchmark results to {output}")
+
+
+@cli.command("benchmark-parsers")
+@click.option(
+    "-p",
+    "--parser",
+    "parsers",
+    type=str,
+    multiple=True,
+    help="Only benchmark pages read by this parser. May be given more than once.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Also save the results as json, to use as a baseline later.",
+)
+@click.option(
+    "-b",
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Results saved by an earlier run. Fail if any page regressed against them.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=0.25,
+    help="How much worse speed or allocations may get before it counts as a regression.",
+)
+def benchmark_parsers(parsers, output, baseline, threshold):
+    """Benchmark the parsers against a corpus of real and scaled help text"""
+    from clix.benchmark.parsers import find_regressions, run_suite
+
+    rows = run_suite(parsers=[NICKS.get(parser, parser) for parser in parsers])
+    table = Table(title="Parsing the help text corpus")
+    table.add_column("Page", style="cyan")
+    for column in ("Parser", "KiB", "Subs", "Options", "Pages/sec", "MB/sec", "Relative"):
+        table.add_column(column)
+    table.add_column("Alloc KiB")
+    for row in rows:
+        table.add_row(
+            row["page"],
+            row["parser"],
+            f"{row['bytes'] / 1024:.1f}",
+            str(row["sub_commands"]),
+            str(row["options"]),
+            f"{row['pages_per_sec']:.0f}",
+            f"{row['mb_per_sec']:.1f}",
+            f"{row['relative_speed']:.3f}",
+            f"{row['alloc_kib']:.1f}",
+        )
+    console = Console()
+    console.print(table)
+    if output:
+        Path(output).write_text(json.dumps(rows, indent=2))
+        console.print(f"Saved benchmark results to {output}")
+    if baseline:
+        regressions = find_regressions(rows, json.loads(Path(baseline).read_text()), threshold)
+        if regressions:
+            raise click.ClickException(
+                "Parsing regressed against the baseline:\n" + "\n".join(regressions)
+            )
+        console.print(f"No regressions against {baseline}")
 
 
 @cli.command()
@@ -242,19 +739,128 @@ def list(subject, cli_name, data_dir):
         else:
             console.print(f"No CLIs have been found in {data_dir}.")
     elif subject == "versions" and NICKS.get(cli_name, cli_name):
-        results = helpers.get_ver_list(NICKS.get(cli_name, cli_name), data_dir)
+        cli_name = NICKS.get(cli_name, cli_name)
+        results = helpers.get_ver_list(cli_name, data_dir)
         if results:
-            table = Table(title=f"Available Versions for {NICKS.get(cli_name, cli_name)}")
+            catalog = Catalog.open(data_dir)
+            table = Table(title=f"Available Versions for {cli_name}")
             table.add_column("Version", style="cyan")
+            for column in ("Commands", "Size (KiB)", "Explored"):
+                table.add_column(column)
             for version in results:
-                table.add_row(version)
+                entry = catalog.entry(cli_name, version)
+                table.add_row(
+                    version, str(entry["nodes"]), f"{entry['size'] / 1024:.1f}", entry["explored"]
+                )
             console.print(table)
         else:
             console.print(
-                "No versions have been explored for "
-                f"{NICKS.get(cli_name, cli_name)} in directory {data_dir}."
+                f"No versions have been explored for {cli_name} in directory {data_dir}."
             )
 
 
+@cli.command()
+@click.option(
+    "-n",
+    "--cli-name",
+    type=str,
+    required=True,
+    help="The name of the cli whose versions to pack.",
+)
+@click.option(
+    "-v",
+    "--version",
+    "versions",
+    type=str,
+    multiple=True,
+    help="A version to pack. May be given more than once. Defaults to every yaml version.",
+)
+@click.option(
+    "--data-dir",
+    type=str,
+    default="./",
+    help="The base directory in which to search for saved exports.",
+)
+def pack(cli_name, versions, data_dir):
+    """Move saved yaml versions into the deduplicated object store"""
+    cli_name = NICKS.get(cli_name, cli_name)
+    console = Console()
+    for version in versions or helpers.get_ver_list(cli_name, data_dir) or []:
+        y_path = Path(f"{data_dir}CLIs/{cli_name}/{version}.yaml")
+        if not y_path.exists():
+            continue
+        cli_data = helpers.load_cli(cli_name, version, data_dir) or {}
+        # saving removes the yaml, so first make sure the objects load back the same
+        store = ObjectStore(data_dir)
+        stored = {name: store.get(store.put_tree(tree)) for name, tree in cli_data.items()}
+        if stored != cli_data:
+            raise click.ClickException(f"{cli_name} {version} didn't round trip. Keeping it.")
+        # only how the version is stored changes, not when it was explored
+        entry = Catalog.open(data_dir).entry(cli_name, version)
+        explored = datetime.fromisoformat(entry["explored"]) if entry else None
+        helpers.save_cli(cli_name, version, cli_data, data_dir, objects=True, explored=explored)
+        console.print(f"Packed {cli_name} {version}")
+
+
+@cli.command()
+@click.option(
+    "-n",
+    "--cli-name",
+    type=str,
+    required=True,
+    help="The name of the cli to search.",
+)
+@click.option(
+    "-c",
+    "--command",
+    type=str,
+    default=None,
+    help='A command, without the cli\'s name ("host create"). "*" matches anything.',
+)
+@click.option(
+    "-o",
+    "--option",
+    type=str,
+    default=None,
+    help='An option the command has ("build" or "--build"). "*" matches anything.',
+)
+@click.option(
+    "--sync",
+    is_flag=True,
+    help="First add any saved versions that are missing from the store, or have changed.",
+)
+@click.option(
+    "--data-dir",
+    type=str,
+    default="./",
+    help="The base directory in which to search for saved exports.",
+)
+def query(cli_name, command, option, sync, data_dir):
+    """Search every stored version of a cli for a command and/or an option"""
+    from clix.store import TreeStore
+
+    if not (command or option):
+        raise click.UsageError("Give a --command, an --option, or both.")
+    cli_name = NICKS.get(cli_name, cli_name)
+    console = Console()
+    with TreeStore(data_dir) as store:
+        if sync:
+            console.print(f"Stored {store.sync(cli_name, data_dir)} version(s) of {cli_name}.")
+        results = store.query(cli_name, command, option)
+    if not results:
+        console.print(f"No stored version of {cli_name} matches.")
+        return
+    table = Table(title=f"Matches in {cli_name}")
+    table.add_column("Version", style="cyan")
+    table.add_column("Command")
+    if option:
+        table.add_column("Option")
+    for version, path, option_name in results:
+        table.add_row(
+            version, f"{cli_name} {path}".strip(), *([f"--{option_name}"] if option else [])
+        )
+    console.print(table)
+
+
 if __name__ == "__main__":
     cli()
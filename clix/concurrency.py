@@ -0,0 +1,89 @@
+"""Limiters that bound how many commands the explorer runs at once."""
+import asyncio
+import time
+
+from logzero import logger
+
+
+class FixedLimiter:
+    """Allow a fixed number of concurrent commands"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._sema = asyncio.Semaphore(value=limit)
+
+    async def acquire(self):
+        await self._sema.acquire()
+
+    def release(self, latency=None, failed=False):
+        self._sema.release()
+
+    def report(self):
+        pass
+
+
+class AdaptiveLimiter:
+    """Find a good concurrency level with additive increase, multiplicative decrease (AIMD)
+
+    The limit grows by roughly one for every `limit` commands that finish while latency
+    stays within `tolerance` times the lowest latency seen. Failures to connect or open
+    a channel, as well as rising latency, cut it by `backoff`, at most once per latency.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5, tolerance=2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.peak = 0
+        self.decreases = 0
+        self._latency = None  # exponentially weighted moving average
+        self._floor = None  # lowest average latency seen, our unloaded estimate
+        self._last_decrease = 0.0
+        self._waiters = []
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+
+    def release(self, latency=None, failed=False):
+        self.in_flight -= 1
+        if failed:
+            self._decrease("a failed connection or channel")
+        elif latency is not None:
+            self._observe(latency)
+        # let all waiters recheck the (possibly new) limit
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _observe(self, latency):
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        self._floor = self._latency if self._floor is None else min(self._floor, self._latency)
+        if self._latency > self._floor * self.tolerance:
+            self._decrease(f"latency rising to {self._latency:.2f}s")
+        elif self.limit < self.maximum:
+            self.limit = min(self.limit + 1 / self.limit, self.maximum)
+
+    def _decrease(self, reason):
+        now = time.monotonic()
+        # only back off once per round trip, so a burst of failures counts once
+        if now - self._last_decrease < (self._latency or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.limit * self.backoff, self.minimum)
+        self.decreases += 1
+        logger.debug(f"Backing off to {int(self.limit)} concurrent sessions after {reason}.")
+
+    def report(self):
+        logger.info(
+            f"Adaptive concurrency settled at {int(self.limit)} sessions "
+            f"(peak {self.peak}, {self.decreases} backoffs)."
+        )
@@ -0,0 +1,121 @@
+"""Pooled, multiplexed ssh connections used while exploring a remote cli."""
+import asyncio
+import time
+
+import asyncssh
+from logzero import logger
+
+
+class TimedClient(asyncssh.SSHClient):
+    """An ssh client that notes when its connection was made and authenticated"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.connected = self.authenticated = None
+
+    def connection_made(self, conn):
+        self.connected = time.monotonic()
+
+    def auth_completed(self):
+        self.authenticated = time.monotonic()
+
+
+class PooledConnection:
+    """A single ssh connection and the number of channels currently open on it"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.active = 0
+
+    @property
+    def closed(self):
+        return self.conn.is_closed()
+
+
+class ConnectionPool:
+    """Keep a few long-lived ssh connections open and multiplex session channels over them
+
+    Connections are opened lazily, up to `pool_size`, and each one carries at most
+    `channels_per_conn` concurrent channels. The latter should not exceed the remote
+    sshd's MaxSessions value, which defaults to 10.
+    """
+
+    def __init__(self, conn_args, pool_size=2, channels_per_conn=10, telemetry=None):
+        self.conn_args = conn_args
+        self.pool_size = pool_size
+        self.channels_per_conn = channels_per_conn
+        self.telemetry = telemetry
+        self.opened = 0  # total number of connections opened over the pool's life
+        self._conns = []
+        self._pending = 0  # connections currently being opened
+        self._cond = asyncio.Condition()
+
+    @property
+    def capacity(self):
+        """The maximum number of commands the pool can run at once"""
+        return self.pool_size * self.channels_per_conn
+
+    async def _open(self):
+        """Open a new connection, keeping the pending count honest on failure"""
+        try:
+            conn, client = await asyncssh.create_connection(TimedClient, **self.conn_args)
+        except BaseException:
+            async with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+            raise
+        if self.telemetry and client.authenticated:
+            self.telemetry.record_connection(
+                client.connected - client.started, client.authenticated - client.connected
+            )
+        pooled = PooledConnection(conn)
+        pooled.active = 1
+        async with self._cond:
+            self._pending -= 1
+            self._conns.append(pooled)
+            self.opened += 1
+            logger.debug(f"Opened pooled connection {self.opened} to {self.conn_args['host']}")
+            self._cond.notify_all()
+        return pooled
+
+    async def acquire(self):
+        """Reserve a channel on the least busy connection, opening a new one if needed"""
+        async with self._cond:
+            while True:
+                # forget about any connections the remote side has dropped
+                self._conns = [pooled for pooled in self._conns if not pooled.closed]
+                free = [pooled for pooled in self._conns if pooled.active < self.channels_per_conn]
+                if free:
+                    pooled = min(free, key=lambda pooled: pooled.active)
+                    pooled.active += 1
+                    return pooled
+                if len(self._conns) + self._pending < self.pool_size:
+                    self._pending += 1
+                    break
+                await self._cond.wait()
+        return await self._open()
+
+    async def release(self, pooled):
+        """Give a channel back to the pool"""
+        async with self._cond:
+            pooled.active -= 1
+            self._cond.notify_all()
+
+    async def run(self, command):
+        """Run a command over a pooled connection and return the completed process"""
+        pooled = await self.acquire()
+        try:
+            # closing the process on the way out frees the channel, even if we're cancelled
+            async with pooled.conn.create_process(command) as process:
+                return await process.wait(check=False)
+        finally:
+            await self.release(pooled)
+
+    async def close(self):
+        """Close every connection in the pool"""
+        async with self._cond:
+            conns, self._conns = self._conns, []
+        for pooled in conns:
+            pooled.conn.close()
+        await asyncio.gather(*(pooled.conn.wait_closed() for pooled in conns))
+        logger.debug(f"Closed {len(conns)} pooled connection(s), {self.opened} opened in total.")
@@ -2,9 +2,8 @@
 from pathlib import Path
 
 from logzero import logger
-import yaml
 
-from clix.helpers import get_latest, get_previous, load_cli
+from clix.helpers import get_latest, get_previous, load_cli, yaml_dump
 
 
 class VersionDiff:
@@ -175,5 +174,5 @@ class VersionDiff:
         fpath.touch()
         logger.info(f"Saving results to {fpath}")
         with fpath.open("w+") as outfile:
-            yaml.dump(self._vdiff, outfile, default_flow_style=False)
+            yaml_dump(self._vdiff, outfile)
         return fpath
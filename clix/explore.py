@@ -1,102 +1,861 @@
 import asyncio
+import bisect
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+import hashlib
+import json
 from pathlib import Path
+import random
+import shlex
+import textwrap
 import time
+from uuid import uuid4
 
 import asyncssh
 from logzero import logger
-import yaml
 
-from clix import helpers
-from clix.parsers import argparse, hammer, subman
+from clix import helpers, plugins, runner
+from clix.cache import HelpCache, fingerprint_command
+from clix.catalog import Catalog, count_nodes
+from clix.concurrency import AdaptiveLimiter, FixedLimiter
+from clix.journal import CrawlJournal
+from clix.objects import ObjectStore
+from clix.telemetry import CrawlTelemetry
+from clix.transports import (
+    LocalTransport,
+    RecordingTransport,
+    ReplayTransport,
+    SSHTransport,
+)
+
+VERIFY_CHUNK = 25  # commands hashed per remote exec when checking a baseline subtree
+BACKOFF_RETRIES = 10  # times an adaptive crawl retries a command the host refused
+RETRY_DELAY = 0.2  # seconds, doubled with each retry, then jittered
+RETRY_DELAY_MAX = 10
+# errors worth retrying a command over, rather than failing its node outright
+TRANSIENT_ERRORS = (asyncio.TimeoutError, OSError, asyncssh.Error)
+CRAWLER_SCRIPT = Path(__file__).parent / "remote_crawler.py"
+CRAWLER_GRACE = 30  # seconds the remote crawler may take beyond its slowest command
+
+
+def process_help(parser, help_text):
+    """Return the sub commands, options, and sub command aliases parsed from help text
+
+    This lives at the module level so a process pool can run it.
+    """
+    if hasattr(parser, "process_help"):
+        return parser.process_help(help_text)
+    sub_commands, options = parser.process_help_text(help_text)
+    aliases = parser.process_aliases(help_text) if hasattr(parser, "process_aliases") else {}
+    return sub_commands, options, aliases
 
 
 class AsyncExplorer:
-    def __init__(
+    def __init__(  # noqa: PLR0915 (too many statements)
         self,
         name=None,
         version=None,
         host=None,
+        port=22,
         user=None,
         password=None,
         max_sessions=10,
+        pool_size=2,
+        channels_per_conn=10,
         adjust_max=True,
+        adaptive=False,
+        timeout=60,
+        retries=2,
+        hedge=False,
+        batch=False,
+        batch_size=25,
+        engine="queue",
+        order="bfs",
+        max_depth=None,
+        stream=False,
+        remote_python="python3",
+        transport="ssh",
+        exec_prefix=None,
+        record=None,
+        replay=None,
+        replay_latency=None,
         parser=None,
         data_dir=None,
         compact=False,
+        resume=False,
+        use_cache=False,
+        fingerprint_cmd=None,
+        baseline=None,
+        dedupe=False,
+        parse_mode="inline",
+        parse_workers=None,
+        store=False,
+        objects=False,
     ):
         self.name = name
         self.version = version
         self.host = host
+        self.port = port
         self.user = user
         self.password = password
         self.max_sessions = max_sessions
+        self.pool_size = pool_size
+        self.channels_per_conn = channels_per_conn
         self.adjust_max = adjust_max
+        self.adaptive = adaptive
+        self.timeout = timeout or None
+        self.retries = retries
+        self.hedge = hedge
+        self.batch = batch
+        self.batch_size = batch_size
+        self.engine = engine
+        self.order = order
+        self.max_depth = max_depth
+        self.stream = stream
+        self.remote_python = remote_python
+        self.exec_prefix = exec_prefix
+        self.record = record
+        self.replay = replay
+        self.replay_latency = replay_latency
         self.parser = parser
         self.data_dir = data_dir
         self.compact = compact
+        self.resume = resume
+        self.use_cache = use_cache
+        self.fingerprint_cmd = fingerprint_cmd
+        self.cache = None
+        self.baseline = baseline
+        self.dedupe = dedupe
+        self.parse_mode = parse_mode
+        self.parse_workers = parse_workers
+        self._parse_pool = None
+        self.store = store
+        self.objects = objects
         self._data = {}
+        self._journaled = {}
+        self._hashes = {}
+        self._baseline = None
+        self._baseline_hashes = {}
+        self._baseline_paths = []  # the baseline's hashed commands, sorted for prefix lookups
+        self._reused = {}
+        self._verified = {}
+        self._failed = {}
+        self._aliases = {}  # command => its aliases, as listed in its parent's help
+        self._shapes = {}  # hash of help text, minus the command itself => commands crawled
+        self._duplicates = {}  # command => the command whose subtree it duplicates
+        self._sshd_values = None
+        self._ssh_pool = None
+        self.global_limiter = None
+        self.finished = False  # set once a crawl gets through the whole cli
 
         """do some things"""
         if not self.version:
             self.version = time.strftime("%Y.%m.%d", time.localtime())
-        # choose the correct parser class from known parsers
-        if self.parser.lower() == "hammer":
-            self.parser = hammer.Hammer()
-        elif self.parser.lower() == "argparse":
-            self.parser = argparse.ArgParse()
-        elif self.parser.lower() == "subscription-manager":
-            self.parser = subman.SubMan()
-        if not self.parser or isinstance(self.parser, str):
-            logger.warning("No known parser specified! Please review documentation.")
-        logger.debug(f"Using parser {self.parser.__class__.__name__}")
+        self._setup_parser()
+        self.journal = CrawlJournal(f"{self.data_dir}CLIs/{self.name}/{self.version}.journal")
+        self.telemetry = CrawlTelemetry(self.name, self.version)
 
         self.conn_args = {
             "host": self.host,
+            "port": self.port,
             "username": self.user,
             "password": self.password,
             "known_hosts": None,
         }
-        self.sema = asyncio.Semaphore(value=self.max_sessions)
+        self._setup_transport(transport)
 
-    async def scrape_help(self, prefix, sub=""):
-        prefix = f"{prefix} {sub}" if sub else prefix
-        command = " ".join([prefix, self.parser.suffix])
-        logger.debug(prefix)
-        await self.sema.acquire()
-        async with asyncssh.connect(**self.conn_args) as conn:
-            result = await conn.run(command, check=False)
-        self.sema.release()
-        if result.exit_status != 0:
+    def _setup_parser(self):
+        """choose the correct parser class from registered parsers"""
+        if parser_class := plugins.load_parser(self.parser):
+            self.parser = parser_class()
+        if not self.parser or isinstance(self.parser, str):
+            logger.warning("No known parser specified! Please review documentation.")
+        logger.debug(f"Using parser {self.parser.__class__.__name__}")
+
+    def _setup_transport(self, transport):
+        """Choose how commands reach the cli and how many may run at once"""
+        if self.adaptive:
+            # the limiter finds what the host can handle, so leave sshd alone
+            self.limiter = AdaptiveLimiter(initial=4, maximum=self.max_sessions)
+            self.adjust_max = False
+        else:
+            self.limiter = FixedLimiter(self.max_sessions)
+        if self.replay:
+            transport = "replay"
+        if self.engine == "remote":
+            if transport != "ssh" or self.record:
+                logger.warning(
+                    "The remote engine needs the ssh transport, and can't be recorded. "
+                    "Using the queue."
+                )
+                self.engine = "queue"
+            else:
+                self.adjust_max = False  # the remote crawler only needs a single session
+        if self.engine == "remote" and self.baseline:
+            logger.warning("The remote engine can't compare against a baseline. Ignoring it.")
+            self.baseline = None
+        if transport == "replay":
+            self.transport = ReplayTransport(self.replay, self.replay_latency)
+            self.adjust_max = False  # there is no host at all
+        elif transport == "local":
+            self.transport = LocalTransport(self.exec_prefix)
+            self.adjust_max = False  # there is no sshd to tune
+        else:
+            self.transport = SSHTransport(
+                self.conn_args, self.pool_size, self.channels_per_conn, self.telemetry
+            )
+            # kept apart from the transport, which may yet be wrapped in a recording
+            self._ssh_pool = self.transport.pool
+            if self.max_sessions > self._ssh_pool.capacity:
+                logger.warning(
+                    f"{self.max_sessions} sessions requested, but the connection pool can only "
+                    f"carry {self._ssh_pool.capacity}. Consider raising the pool size."
+                )
+        if self.record:
+            self.transport = RecordingTransport(self.transport, self.record)
+        logger.debug(f"Using transport {self.transport.__class__.__name__}")
+
+    async def _setup_cache(self):
+        """Fingerprint the installed cli build and point the help cache at it"""
+        result = await self.transport.run(fingerprint_command(self.name, self.fingerprint_cmd))
+        if result.exit_status != 0 or not result.stdout.strip():
+            logger.warning("Unable to fingerprint the installed cli. Help cache disabled.")
+            return
+        logger.debug(f"CLI fingerprint: {result.stdout.strip()}")
+        self.cache = HelpCache(f"{self.data_dir}cache/{self.name}", self.name, result.stdout)
+
+    def _release(self, latency=None, failed=False):
+        """Give back our slots in both this explorer's and the shared limiter"""
+        if self.global_limiter:
+            self.global_limiter.release()
+        self.limiter.release(latency=latency, failed=failed)
+
+    async def _hedged_run(self, command):
+        """Run a command, sending a duplicate if it's slower than the running p95
+
+        Whichever copy answers first wins, and the other is cancelled. The duplicate
+        doesn't count against the limiter, but still needs a free channel in the pool.
+        """
+        delay = self.telemetry.hedge_delay() if self.hedge else None
+        primary = asyncio.ensure_future(self.transport.run(command))
+        if delay is None:
+            return await primary
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                logger.debug(f"Hedging {command} after {delay:.2f}s")
+                self.telemetry.record_hedge()
+                tasks.add(asyncio.ensure_future(self.transport.run(command)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if not task.exception()]
+                if winners or not tasks:
+                    return (winners or [*done])[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _attempt(self, command):
+        """Run a command once, within the concurrency limits and the command deadline"""
+        queued = time.monotonic()
+        await self.limiter.acquire()
+        if self.global_limiter:
+            try:
+                await self.global_limiter.acquire()
+            except BaseException:
+                self.limiter.release()
+                raise
+        start = time.monotonic()
+        self.telemetry.command_started()
+        try:
+            result = await asyncio.wait_for(self._hedged_run(command), self.timeout)
+        except TRANSIENT_ERRORS:
+            self._release(failed=True)
+            raise
+        except BaseException:
+            self._release()
+            raise
+        finally:
+            self.telemetry.command_finished()
+        duration = time.monotonic() - start
+        self._release(latency=duration)
+        self.telemetry.record_command(
+            command,
+            start - queued,
+            duration,
+            result.stdout or "",
+            result.stderr or "",
+            result.exit_status,
+        )
+        return result
+
+    async def _run_command(self, command):
+        """Run a command through the transport, retrying transient failures
+
+        Retries wait for a jittered, exponentially growing delay. Adaptive crawls also
+        keep retrying while the host refuses new channels, as the limiter backs off.
+        """
+        for attempt in range(max(self.retries, BACKOFF_RETRIES) + 1):
+            try:
+                return await self._attempt(command)
+            except TRANSIENT_ERRORS as exc:
+                refused = isinstance(exc, asyncssh.ChannelOpenError | ConnectionRefusedError)
+                if attempt >= (BACKOFF_RETRIES if self.adaptive and refused else self.retries):
+                    raise
+                delay = random.uniform(0, min(RETRY_DELAY * 2**attempt, RETRY_DELAY_MAX))
+                logger.debug(f"Retrying {command} in {delay:.2f}s after {exc!r}")
+                self.telemetry.record_retry()
+                await asyncio.sleep(delay)
+
+    def _record_failure(self, prefix, exc):
+        """Note a command that couldn't be scraped, so the crawl can carry on without it"""
+        if isinstance(exc, asyncio.TimeoutError):
+            error = f"timed out after {self.timeout}s"
+        else:
+            error = str(exc) or exc.__class__.__name__
+        logger.warning(f"Giving up on {prefix}: {error}")
+        self._failed[prefix] = error
+        self.telemetry.record_failure(prefix, error)
+        self.journal.record(prefix, sub_commands=[], options=[], hash=None, error=error)
+        return [], [], None
+
+    def _check_help(self, command, stdout, exit_status, stderr=""):
+        """Warn about failed help commands and cache the output of successful ones"""
+        if exit_status != 0:
             logger.warning(
-                f"""Recieved non-zero exit code: {result.exit_status}
-                 for command {command}. Result {result.stderr}"""
+                f"""Recieved non-zero exit code: {exit_status}
+                 for command {command}. Result {stderr}"""
             )
-        help_text = result.stdout
-        logger.debug(help_text)
-        sub_commands, options = self.parser.process_help_text(help_text)
-        # create and run a scrape for each sub command n
-        tasks = [
-            asyncio.ensure_future(self.scrape_help(prefix, sub_command))
-            for sub_command in sub_commands
+        elif self.cache:
+            self.cache.put(command, stdout)
+        logger.debug(stdout)
+        return stdout
+
+    async def _run_help(self, command):
+        """Run a single help command, or pull it from the cache, and return its output"""
+        if self.cache:
+            cached = self.cache.get(command)
+            if cached is not None:
+                return cached
+        result = await self._run_command(command)
+        return self._check_help(command, result.stdout, result.exit_status, result.stderr)
+
+    async def _run_batch(self, prefix, batch):
+        """Run the help commands of several sibling commands in a single exec
+
+        Each command's output is followed by a unique delimiter and its exit status,
+        so the combined output can be split back apart.
+        """
+        commands = [" ".join([prefix, sub, self.parser.suffix]) for sub in batch]
+        # derived from the batch, rather than random, so recorded batches can be replayed
+        delim = f"CLIX-{hashlib.sha256(chr(0).join(commands).encode()).hexdigest()[:32]}"
+        script = "; ".join(
+            f"{shlex.join(command.split())} 2>/dev/null; "
+            f"printf '\\n%s %s %s\\n' {delim} {index} \"$?\""
+            for index, command in enumerate(commands)
+        )
+        try:
+            result = await self._run_command(f"sh -c {shlex.quote(script)}")
+        except TRANSIENT_ERRORS as exc:
+            logger.warning(f"Batch under {prefix} failed: {exc!r}. Using single commands.")
+            return {}
+        pieces = result.stdout.split(f"\n{delim} ")
+        help_texts, stdout = {}, pieces[0]
+        for piece in pieces[1:]:
+            header, _, next_stdout = piece.partition("\n")
+            index, exit_status = (int(val) for val in header.split())
+            help_texts[batch[index]] = self._check_help(commands[index], stdout, exit_status)
+            stdout = next_stdout
+        if len(help_texts) < len(batch):
+            logger.warning(f"Batch under {prefix} was cut short. Falling back to single commands.")
+        return help_texts
+
+    async def _prefetch_help(self, prefix, sub_commands):
+        """Fetch the help text of every sub command that needs scraping, in batches"""
+        help_texts, pending = {}, []
+        for sub_command in sub_commands:
+            path = f"{prefix} {sub_command}"
+            if path in self._journaled or self._unchanged_node(path) is not None:
+                continue
+            cached = self.cache.get(f"{path} {self.parser.suffix}") if self.cache else None
+            if cached is not None:
+                help_texts[sub_command] = cached
+            else:
+                pending.append(sub_command)
+        batches = [
+            pending[i : i + self.batch_size] for i in range(0, len(pending), self.batch_size)
         ]
-        completed = await asyncio.gather(*tasks)
-        sorted(completed)
-        # loop over the results and pass them up
-        subs = {sub_command: results for sub_command, results in completed}
-        # put everything together and return the results
+        for batch_texts in await asyncio.gather(*(self._run_batch(prefix, b) for b in batches)):
+            help_texts.update(batch_texts)
+        return help_texts
+
+    def _load_baseline(self):
+        """Load a previously explored version to compare help text hashes against"""
+        baseline = helpers.load_cli(self.name, self.baseline, self.data_dir)
+        hashes = helpers.load_hashes(self.name, self.baseline, self.data_dir)
+        if not baseline or not hashes:
+            logger.warning(f"Unable to use {self.baseline} as a baseline. Exploring everything.")
+            return
+        self._baseline = self.parser.yaml_format(baseline[self.name])
+        self._baseline_hashes = hashes
+        self._baseline_paths = sorted(hashes)
+
+    def _baseline_node(self, prefix):
+        """Find a command's node in the baseline tree, if it's there"""
+        node = self._baseline
+        for part in prefix[len(self.name) :].split():
+            node = node.get("sub_commands", {}).get(part)
+            if node is None:
+                return None
+        return node
+
+    async def _verify_hashes(self, paths):
+        """Hash the current help text of many commands, using one remote exec per chunk"""
+
+        async def verify(chunk):
+            script = "; ".join(
+                f"{shlex.join([*path.split(), self.parser.suffix])} 2>/dev/null | sha256sum"
+                for path in chunk
+            )
+            try:
+                result = await self._run_command(f"sh -c {shlex.quote(script)}")
+            except TRANSIENT_ERRORS as exc:
+                # anything left unverified is treated as changed, and scraped
+                logger.debug(f"Unable to verify {len(chunk)} baseline hashes: {exc!r}")
+                return
+            for path, line in zip(chunk, result.stdout.splitlines(), strict=False):
+                self._verified[path] = line.split()[0] if line.strip() else None
+
+        chunks = [paths[i : i + VERIFY_CHUNK] for i in range(0, len(paths), VERIFY_CHUNK)]
+        await asyncio.gather(*(verify(chunk) for chunk in chunks))
+
+    def _baseline_below(self, prefix):
+        """Return every command below a command in the baseline, without scanning them all"""
+        # "<prefix> <anything>" sorts after "<prefix> " and before "<prefix>!"
+        start = bisect.bisect_left(self._baseline_paths, f"{prefix} ")
+        end = bisect.bisect_left(self._baseline_paths, f"{prefix}!", start)
+        return self._baseline_paths[start:end]
+
+    def _unchanged_node(self, prefix):
+        """Return a command's baseline node if its help text was verified as unchanged"""
+        help_hash = self._verified.get(prefix)
+        if help_hash and help_hash == self._baseline_hashes.get(prefix):
+            return self._baseline_node(prefix)
+        return None
+
+    async def _from_baseline(self, prefix, help_hash):
+        """Return the baseline's subtree for a command, if nothing in it has changed
+
+        The command's own help text is compared first. Then everything below it is
+        hashed in a few batched remote commands and compared against the baseline.
+        """
+        if not help_hash or self._baseline_hashes.get(prefix) != help_hash:
+            return None
+        subtree = self._baseline_node(prefix)
+        if subtree is None:
+            return None
+        below = self._baseline_below(prefix)
+        await self._verify_hashes([path for path in below if path not in self._verified])
+        if any(self._verified.get(path) != self._baseline_hashes[path] for path in below):
+            # descend, but any unchanged commands below won't need a full scrape
+            return None
+        logger.debug(f"{prefix} is unchanged since {self.baseline}. Reusing its subtree.")
+        self._reused[prefix] = subtree
+        return subtree
+
+    def _collect_hashes(self):
+        """Fill in the hashes for everything below the subtrees reused from the baseline"""
+        reused = set(self._reused)
+        for path, help_hash in self._baseline_hashes.items():
+            parts = path.split()
+            if any(" ".join(parts[:depth]) in reused for depth in range(1, len(parts))):
+                self._hashes.setdefault(path, help_hash)
+        # duplicates' help text differs by path, so these won't verify against a later
+        # version, but their presence makes a baseline check descend into the duplicate
+        for prefix, original in self._duplicates.items():
+            for path, help_hash in list(self._hashes.items()):
+                if path.startswith(f"{original} "):
+                    self._hashes.setdefault(f"{prefix}{path[len(original) :]}", help_hash)
+        # failed commands have no help text, so there's nothing to compare against later
+        return {path: help_hash for path, help_hash in self._hashes.items() if help_hash}
+
+    def _start_parse_pool(self):
+        """Create the executor that parses help text off of the event loop, if desired"""
+        if self.parse_mode == "process":
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        elif self.parse_mode == "thread":
+            self._parse_pool = ThreadPoolExecutor(max_workers=self.parse_workers)
+        if self._parse_pool:
+            logger.debug(f"Parsing help text in a {self.parse_mode} pool")
+
+    async def _parse_help(self, prefix, help_text):
+        """Parse a command's help text, journaling the results as we go"""
+        help_hash = hashlib.sha256(help_text.encode()).hexdigest()
+        start = time.monotonic()
+        if self._parse_pool:
+            sub_commands, options, aliases = await asyncio.get_running_loop().run_in_executor(
+                self._parse_pool, process_help, self.parser, help_text
+            )
+        else:
+            sub_commands, options, aliases = process_help(self.parser, help_text)
+        self.telemetry.record_parse(time.monotonic() - start)
+        record = {"sub_commands": sub_commands, "options": options, "hash": help_hash}
+        if aliases:
+            record["aliases"] = aliases
+        if self.dedupe and sub_commands:
+            # the same subtree mounted elsewhere differs only by the command's own path
+            record["shape"] = hashlib.sha256(help_text.replace(prefix, "").encode()).hexdigest()
+        self._track_record(prefix, record)
+        if prefix in self._duplicates:
+            record["duplicate_of"] = self._duplicates[prefix]
+        self.journal.record(prefix, **record)
+        return sub_commands, options, help_hash
+
+    def _track_record(self, prefix, record):
+        """Note a parsed command's aliases, and whether its subtree was already seen"""
+        for sub_command, aliases in record.get("aliases", {}).items():
+            self._aliases[f"{prefix} {sub_command}"] = aliases
+        if record.get("duplicate_of"):
+            self._duplicates[prefix] = record["duplicate_of"]
+        elif record.get("shape"):
+            holders = self._shapes.setdefault(record["shape"], [])
+            # a command can't stand in for its own descendant, but may for that one's siblings
+            original = next(
+                (
+                    holder
+                    for holder in holders
+                    if holder != prefix and not prefix.startswith(f"{holder} ")
+                ),
+                None,
+            )
+            if original:
+                logger.debug(f"{prefix} duplicates {original}. Referencing it instead.")
+                self._duplicates[prefix] = original
+            elif prefix not in holders:
+                holders.append(prefix)
+
+    def _assemble(self, prefix, nodes):
+        """Build the nested results for a command from a flat mapping of parsed nodes"""
+        if prefix in self._reused:
+            return self._reused[prefix]
+        if prefix in self._duplicates:
+            # a fresh copy, so yaml writes the whole subtree out again, not an anchor to it
+            results = copy.deepcopy(self._assemble(self._duplicates[prefix], nodes))
+            results.pop("aliases", None)
+            if prefix in self._aliases:
+                results["aliases"] = self._aliases[prefix]
+            return results
+        sub_commands, options = nodes[prefix]
+        subs = {
+            sub_command: self._assemble(f"{prefix} {sub_command}", nodes)
+            for sub_command in sub_commands
+            if f"{prefix} {sub_command}" in nodes
+        }
         results = {}
         if subs:
             results["sub_commands"] = subs
         if options:
             results["options"] = options
-        if len(prefix.split()) == 1:
-            self._data = results
+        if prefix in self._aliases:
+            results["aliases"] = self._aliases[prefix]
+        if prefix in self._failed:
+            results["error"] = self._failed[prefix]
+        return results
+
+    def _crawler_silence(self):
+        """Return how long the remote crawler may go without answering, or None to wait forever
+
+        Whatever is queued, some command finishes within a command's worst case:
+        every try timing out, with the longest backoff between them.
+        """
+        if not self.timeout:
+            return None
+        backoff = sum(
+            min(RETRY_DELAY * 2**attempt, RETRY_DELAY_MAX) for attempt in range(self.retries)
+        )
+        return self.timeout * (self.retries + 1) + backoff + CRAWLER_GRACE
+
+    @staticmethod
+    def _crawler_failed(process, reason, stderr=""):
+        return asyncssh.ProcessError(
+            env=None,
+            command=process.command,
+            subsystem=None,
+            exit_status=process.exit_status,
+            exit_signal=None,
+            returncode=process.returncode,
+            stdout="",
+            stderr=stderr,
+            reason=reason,
+        )
+
+    async def _drive_remote(self, process):
+        """Feed commands to the remote crawler and parse what it streams back
+
+        Sub commands are sent back to the crawler as soon as their parent is parsed,
+        so the remote side always has work queued.
+        """
+        nodes, outstanding = {}, 0
+
+        async def visit(prefix):
+            nonlocal outstanding
+            if prefix in self._journaled:
+                record = self._journaled[prefix]
+                self._track_record(prefix, record)
+                await handle(prefix, record["sub_commands"], record["options"], record.get("hash"))
+                return
+            command = " ".join([prefix, self.parser.suffix])
+            cached = self.cache.get(command) if self.cache else None
+            if cached is not None:
+                await handle(prefix, *await self._parse_help(prefix, cached))
+                return
+            process.stdin.write(json.dumps({"path": prefix}) + "\n")
+            outstanding += 1
+
+        async def handle(prefix, sub_commands, options, help_hash):
+            self._hashes[prefix] = help_hash
+            if not self.stream:
+                nodes[prefix] = sub_commands, options
+            if not self._below_max_depth(prefix) or prefix in self._duplicates:
+                return
+            for sub_command in sub_commands:
+                await visit(f"{prefix} {sub_command}")
+
+        await visit(self.name)
+        silence = self._crawler_silence()
+        while outstanding:
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), silence)
+            except asyncio.TimeoutError:
+                reason = f"The remote crawler sent nothing for {silence:.0f}s."
+                raise self._crawler_failed(process, reason) from None
+            if not line:
+                stderr = await process.stderr.read()
+                raise self._crawler_failed(process, "The remote crawler exited early.", stderr)
+            outstanding -= 1
+            record = json.loads(line)
+            if record.get("error"):
+                await handle(
+                    record["path"], *self._record_failure(record["path"], record["error"])
+                )
+                continue
+            command = " ".join([record["path"], self.parser.suffix])
+            help_text = self._check_help(
+                command, record["stdout"], record["status"], record["stderr"]
+            )
+            await handle(record["path"], *await self._parse_help(record["path"], help_text))
+        process.stdin.write_eof()
+        return nodes
+
+    async def _crawl_remote(self):
+        """Walk the cli with a crawler uploaded to the target host, over a single connection"""
+        pool = self._ssh_pool
+        pooled = await pool.acquire()
+        remote_path = f"/tmp/clix-crawler-{uuid4().hex}.py"
+        try:
+            async with pooled.conn.start_sftp_client() as sftp:
+                await sftp.put(str(CRAWLER_SCRIPT), remote_path)
+            logger.debug(f"Uploaded the remote crawler to {remote_path}")
+            command = shlex.join(
+                [
+                    *shlex.split(self.remote_python),
+                    remote_path,
+                    f"--workers={self.max_sessions}",
+                    f"--timeout={self.timeout or 0}",
+                    f"--retries={self.retries}",
+                    f"--suffix={self.parser.suffix}",
+                ]
+            )
+            async with pooled.conn.create_process(command) as process:
+                nodes = await self._drive_remote(process)
+        finally:
+            if not pooled.closed:
+                await pooled.conn.run(f"rm -f {remote_path}", check=False)
+            await pool.release(pooled)
+        if not self.stream:
+            self._data = self._assemble(self.name, nodes)
+
+    async def scrape_help(self, prefix, help_text=None):
+        """Return the sub commands, options, and help hash for a single command"""
+        logger.debug(prefix)
+        if prefix in self._journaled:
+            # we already scraped this command in an earlier, interrupted run
+            record = self._journaled[prefix]
+            self._track_record(prefix, record)
+            return record["sub_commands"], record["options"], record.get("hash")
+        node = self._unchanged_node(prefix)
+        if node is not None:
+            # the help text matches the baseline, so its parsed contents do too
+            sub_commands, options = [*node.get("sub_commands", {})], node.get("options", [])
+            help_hash = self._verified[prefix]
+            self.journal.record(prefix, sub_commands=sub_commands, options=options, hash=help_hash)
+            return sub_commands, options, help_hash
+        if help_text is None:
+            try:
+                help_text = await self._run_help(" ".join([prefix, self.parser.suffix]))
+            except TRANSIENT_ERRORS as exc:
+                if prefix == self.name:
+                    raise  # without the top-level help, there's nothing to explore
+                return self._record_failure(prefix, exc)
+        return await self._parse_help(prefix, help_text)
+
+    def _below_max_depth(self, prefix):
+        """Determine whether a command's sub commands should be explored"""
+        return self.max_depth is None or len(prefix[len(self.name) :].split()) < self.max_depth
+
+    async def _visit(self, prefix, help_text, frontier, nodes):
+        """Scrape a single command and add its sub commands to the frontier"""
+        sub_commands, options, help_hash = await self.scrape_help(prefix, help_text)
+        self._hashes[prefix] = help_hash
+        if not self.stream:
+            nodes[prefix] = sub_commands, options
+        if not self._below_max_depth(prefix) or prefix in self._duplicates:
+            return
+        if self._baseline and await self._from_baseline(prefix, help_hash) is not None:
+            return
+        prefetched = await self._prefetch_help(prefix, sub_commands) if self.batch else {}
+        for sub_command in sub_commands:
+            frontier.put_nowait((f"{prefix} {sub_command}", prefetched.get(sub_command)))
+
+    async def _worker(self, frontier, nodes):
+        """Pull commands off of the frontier until the crawl is cancelled"""
+        while True:
+            prefix, help_text = await frontier.get()
+            try:
+                await self._visit(prefix, help_text, frontier, nodes)
+            finally:
+                frontier.task_done()
+
+    async def _crawl_queue(self):
+        """Walk the cli with a fixed pool of workers sharing a frontier of commands
+
+        A FIFO frontier gives a breadth-first crawl, and a LIFO one a depth-first crawl.
+        Either way, the number of tasks is bounded by the number of workers.
+        """
+        frontier = asyncio.Queue() if self.order == "bfs" else asyncio.LifoQueue()
+        nodes = {}
+        frontier.put_nowait((self.name, None))
+        workers = [
+            asyncio.ensure_future(self._worker(frontier, nodes)) for _ in range(self.max_sessions)
+        ]
+        finished = asyncio.ensure_future(frontier.join())
+        try:
+            # a worker only finishes early if it hit an error
+            await asyncio.wait([finished, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for worker in workers:
+                if worker.done():
+                    worker.result()
+        finally:
+            for task in [finished, *workers]:
+                task.cancel()
+            await asyncio.gather(finished, *workers, return_exceptions=True)
+        if not self.stream:
+            self._data = self._assemble(self.name, nodes)
+
+    def _journal_nodes(self):
+        """Load the flat mapping of parsed nodes back out of the journal"""
+        self.journal.close()
+        records = self.journal.load()
+        self._failed = {prefix: rec["error"] for prefix, rec in records.items() if "error" in rec}
+        for prefix, record in records.items():
+            self._track_record(prefix, record)
+        return {prefix: (rec["sub_commands"], rec["options"]) for prefix, rec in records.items()}
+
+    def _stream_results(self, outfile, nodes):
+        """Write the results one top-level subtree at a time, returning how many nodes it held
+
+        Only the flat nodes and a single nested subtree are held in memory at once,
+        rather than the whole nested tree and yaml's representation of it.
+        """
+        # let yaml decide how the cli's name should be quoted
+        outfile.write(helpers.yaml_dump({self.name: {}}).replace(" {}\n", "\n"))
+        sub_commands, options = nodes[self.name]
+        if options:
+            chunk = helpers.yaml_dump({"options": options})
+            outfile.write(textwrap.indent(chunk, "  "))
+        sub_commands = sorted(sub for sub in sub_commands if f"{self.name} {sub}" in nodes)
+        if sub_commands:
+            outfile.write("  sub_commands:\n")
+        node_count = 1
+        for sub_command in sub_commands:
+            subtree = self.parser.yaml_format(self._assemble(f"{self.name} {sub_command}", nodes))
+            node_count += count_nodes(subtree)
+            chunk = helpers.yaml_dump({sub_command: subtree})
+            outfile.write(textwrap.indent(chunk, "    "))
+        return node_count
+
+    @staticmethod
+    def _remove_saved(fpath):
+        """A version is saved in one format or the other, so remove whichever we're replacing"""
+        for old_path in (fpath, fpath.with_suffix(".tree")):
+            if old_path.exists():
+                logger.warning(f"{old_path} already exists. Deleting..")
+                old_path.unlink()
+
+    def _save_yaml(self, fpath, yaml_data, nodes):
+        """Save the results as yaml, returning how many nodes they held"""
+        fpath.touch()
+        logger.info(f"Saving results to {fpath}")
+        with fpath.open("w+") as outfile:
+            if nodes is not None:
+                return self._stream_results(outfile, nodes)
+            helpers.yaml_dump({self.name: yaml_data}, outfile)
+            return count_nodes(yaml_data)
+
+    def _save_objects(self, yaml_data, nodes):
+        """Save the results to the object store, returning the manifest's path and node count
+
+        Streamed results are stored one top-level subtree at a time, as they're written to yaml.
+        """
+        store = ObjectStore(self.data_dir)
+        if nodes is None:
+            root_hash, node_count = store.put_tree(yaml_data), count_nodes(yaml_data)
         else:
-            return sub, results
+            sub_commands, options = nodes[self.name]
+            root = {"options": options} if options else {}
+            node_count = 1
+            sub_commands = sorted(sub for sub in sub_commands if f"{self.name} {sub}" in nodes)
+            for sub_command in sub_commands:
+                prefix = f"{self.name} {sub_command}"
+                subtree = self.parser.yaml_format(self._assemble(prefix, nodes))
+                node_count += count_nodes(subtree)
+                root.setdefault("sub_commands", {})[sub_command] = store.put_tree(subtree)
+            root_hash = store.put(root)
+        m_path = Path(f"{self.data_dir}CLIs/{self.name}/{self.version}.tree")
+        store.save_version(m_path, self.name, self.version, self.name, root_hash, node_count)
+        return m_path, node_count
+
+    def _store_results(self, yaml_data, catalog):
+        """Add the saved results to the tree store, reading them back if they were streamed"""
+        from clix.store import TreeStore
+
+        if yaml_data is None:
+            cli_dict = helpers.load_cli(self.name, self.version, self.data_dir)
+        else:
+            cli_dict = {self.name: yaml_data}
+        content_hash = catalog.entry(self.name, self.version)["hash"]
+        with TreeStore(self.data_dir) as store:
+            store.add(self.name, self.version, cli_dict, content_hash)
+            logger.info(f"Added {self.name} {self.version} to the tree store at {store.path}")
 
     def save_results(self):
         """convert the stored data into yaml-friendly dict and save"""
-        yaml_data = self.parser.yaml_format(self._data)
+        if not self.finished:
+            # a partial tree isn't a version, and the journal is what lets a rerun resume
+            logger.warning(f"{self.name} {self.version} wasn't fully explored. Nothing was saved.")
+            return None
+        nodes = None
+        if self.stream:
+            nodes = self._journal_nodes()
+            if self.name not in nodes:
+                logger.warning("No data to be saved. Exiting.")
+                return None
+            if self.compact or self.name in self._reused:
+                # these need the whole tree anyway, so assemble it up front
+                self._data, nodes = self._assemble(self.name, nodes), None
+        yaml_data = self.parser.yaml_format(self._data) if nodes is None else nodes
         if not yaml_data:
             logger.warning("No data to be saved. Exiting.")
             return None
@@ -107,56 +866,142 @@ class AsyncExplorer:
             fpath = Path(f"{self.data_dir}CLIs/{self.name}/{self.version}-comp.yaml")
         else:
             fpath = Path(f"{self.data_dir}CLIs/{self.name}/{self.version}.yaml")
-        if fpath.exists():
-            logger.warning(f"{fpath} already exists. Deleting..")
-            fpath.unlink()
+        self._remove_saved(fpath)
         # create the directory, if it doesn't exist
         fpath.parent.mkdir(parents=True, exist_ok=True)
-        fpath.touch()
-        logger.info(f"Saving results to {fpath}")
-        with fpath.open("w+") as outfile:
-            yaml.dump({self.name: yaml_data}, outfile, default_flow_style=False)
+        if self.objects and not self.compact:
+            fpath, node_count = self._save_objects(yaml_data if nodes is None else None, nodes)
+        else:
+            node_count = self._save_yaml(fpath, yaml_data, nodes)
+        if not self.compact:
+            catalog = Catalog.open(self.data_dir)
+            catalog.record(self.name, self.version, fpath, node_count)
+            if self.store:
+                self._store_results(yaml_data if nodes is None else None, catalog)
+        helpers.save_hashes(self.name, self.version, self._collect_hashes(), self.data_dir)
+        # everything in the journal is now safely stored in the results,
+        # unless some commands failed and may be retried with --resume
+        if not self._failed:
+            self.journal.remove()
         return fpath
 
-    def explore(self):
-        """Main function for the explore module"""
-        # raise the number of max sessions, if necessary and desired
-        if self.adjust_max:
-            logger.debug("Attempting to determine the max session count")
-            curr_vals = helpers.get_max_connections(self.host, self.user, self.password)
-            if not curr_vals:
-                logger.warning("Unable to get max connections. Exiting.")
-            max_sess = int(curr_vals[0].split()[-1])
-            logger.debug(f"Current max sessions {max_sess}")
-            if max_sess < self.max_sessions:
-                logger.debug(
-                    "Current max sessions are lower than desired. Attempting to expand..."
-                )
-                new_sess_val = helpers.set_max_sessions(
-                    curr_vals[0], self.max_sessions, self.host, self.user, self.password
-                )
-                new_start_val = helpers.set_max_starts(
-                    curr_vals[1], self.max_sessions, self.host, self.user, self.password
-                )
-                if not new_sess_val or not new_start_val:
-                    logger.warning(f"Unable to set session values. Reverting to {max_sess}.")
-                    self.max_sessions = max_sess
-                    self.sema = asyncio.Semaphore(value=self.max_sessions)
-                    self.adjust_max = False
-                else:
-                    helpers.restart_sshd(self.host, self.user, self.password)
+    async def _crawl(self):
+        """Scrape the whole cli, making sure the transport is closed afterwards"""
+        self.finished = False
+        if self.resume:
+            # commands that failed last time get another chance
+            self._journaled = {
+                prefix: record
+                for prefix, record in self.journal.load().items()
+                if "error" not in record
+            }
+        self.journal.open(resume=self.resume)
+        self._start_parse_pool()
+        try:
+            if self.use_cache:
+                await self._setup_cache()
+            if self.baseline:
+                self._load_baseline()
+            if self.engine == "remote":
+                await self._crawl_remote()
             else:
+                await self._crawl_queue()
+        finally:
+            if self._parse_pool:
+                self._parse_pool.shutdown(cancel_futures=True)
+                self._parse_pool = None
+            self.journal.close()
+            await self.transport.close()
+            self.telemetry.save()
+        self.finished = True
+        self.limiter.report()
+        if self.cache:
+            self.cache.report()
+        if self._baseline:
+            logger.info(f"Reused {len(self._reused)} unchanged subtree(s) from {self.baseline}.")
+        if self._duplicates:
+            logger.info(f"Referenced {len(self._duplicates)} duplicate subtree(s).")
+        if self._failed:
+            logger.warning(
+                f"{len(self._failed)} command(s) failed and are marked with an error in the "
+                "results. Rerun with --resume to retry only those."
+            )
+
+    def _raise_max_sessions(self):
+        """Raise the host's MaxSessions value, if necessary and desired
+
+        Since channels are multiplexed, only the per-connection channel count matters here.
+        """
+        if not self.adjust_max:
+            return
+        logger.debug("Attempting to determine the max session count")
+        curr_vals = helpers.get_max_connections(self.host, self.user, self.password)
+        if not curr_vals:
+            logger.warning("Unable to get max connections. Leaving sshd as it is.")
+            self.adjust_max = False
+            return
+        max_sess = int(curr_vals[0].split()[-1])
+        logger.debug(f"Current max sessions {max_sess}")
+        if max_sess < self.channels_per_conn:
+            logger.debug("Current max sessions are lower than desired. Attempting to expand...")
+            new_sess_val = helpers.set_max_sessions(
+                curr_vals[0], self.channels_per_conn, self.host, self.user, self.password
+            )
+            new_start_val = helpers.set_max_starts(
+                curr_vals[1], max(self.pool_size, 10), self.host, self.user, self.password
+            )
+            if not new_sess_val or not new_start_val:
+                logger.warning(f"Unable to set session values. Reverting to {max_sess}.")
+                self.channels_per_conn = self._ssh_pool.channels_per_conn = max_sess
                 self.adjust_max = False
+            else:
+                helpers.restart_sshd(self.host, self.user, self.password)
+                self._sshd_values = curr_vals, (new_sess_val, new_start_val)
+        else:
+            self.adjust_max = False
+
+    def _restore_max_sessions(self):
+        """Revert the session changes, if applied"""
+        if not self.adjust_max or not self._sshd_values:
+            return
+        (sess_val, start_val), (new_sess_val, new_start_val) = self._sshd_values
+        helpers.set_max_sessions(new_sess_val, sess_val, self.host, self.user, self.password)
+        helpers.set_max_starts(new_start_val, start_val, self.host, self.user, self.password)
+
+    def explore(self):
+        """Main function for the explore module"""
+        self._raise_max_sessions()
         # run the loop to explore the cli
         try:
-            asyncio.get_event_loop().run_until_complete(self.scrape_help(prefix=self.name))
+            runner.run(self._crawl())
         except (OSError, asyncssh.Error) as exc:
             logger.warning(f"SSH connection failed: {exc}")
-        # revert the session changes, if applied
-        if self.adjust_max:
-            new_sess_val = helpers.set_max_sessions(
-                new_sess_val, curr_vals[0], self.host, self.user, self.password
-            )
-            new_start_val = helpers.set_max_starts(
-                new_start_val, curr_vals[1], self.host, self.user, self.password
+            logger.warning(f"Progress was saved to {self.journal.path}. Rerun with --resume.")
+        self._restore_max_sessions()
+
+    @staticmethod
+    def explore_all(explorers, max_total=None):
+        """Explore several targets concurrently, sharing a single event loop
+
+        Each explorer keeps its own concurrency limits, while `max_total` caps the
+        number of commands running across all of them.
+        """
+        global_limiter = asyncio.Semaphore(value=max_total) if max_total else None
+        for explorer in explorers:
+            explorer.global_limiter = global_limiter
+            explorer._raise_max_sessions()
+
+        async def crawl_all():
+            # gathered inside the shared loop, so the futures belong to it
+            return await asyncio.gather(
+                *(explorer._crawl() for explorer in explorers), return_exceptions=True
             )
+
+        results = runner.run(crawl_all())
+        for explorer, result in zip(explorers, results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"Exploring {explorer.name} {explorer.version} failed: {result!r}\n"
+                    f"Progress was saved to {explorer.journal.path}. Rerun with resume: true."
+                )
+            explorer._restore_max_sessions()
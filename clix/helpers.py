@@ -1,7 +1,11 @@
 """A collection of miscellaneous helpers that don't quite fit in."""
 import asyncio
+import hashlib
+import json
+import marshal
 from pathlib import Path
 import re
+import sys
 from time import sleep
 from uuid import uuid4
 
@@ -10,7 +14,16 @@ from logzero import logger
 from packaging.version import Version
 import yaml
 
+from clix import runner
+
+try:  # libyaml is many times faster, when pyyaml was built with it
+    from yaml import CSafeDumper as YamlDumper, CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper, SafeLoader as YamlLoader
+
 MODULE_DATA = {}  # not ideal, but async is funky
+# marshal's format may change between python versions, so sidecars record which wrote them
+SIDECAR_FORMAT = (marshal.version, *sys.version_info[:2])
 KEYWORDS = [
     "False",
     "class",
@@ -56,37 +69,16 @@ class LooseVersion(Version):
 
 def get_cli_list(data_dir=None, mock=False):
     """Return a list of saved CLIs, if they exist"""
-    cli_dir = Path(f"{data_dir}CLIs/" if not mock else f"{data_dir}tests/CLIs/")
-    # check exists
-    if not cli_dir.exists():
-        return None
-    # get all cli names, which are directories
-    clis = [cli.name for cli in cli_dir.iterdir() if cli.is_dir()] or []
-    clis.sort(reverse=True)
-    return clis
+    from clix.catalog import Catalog
+
+    return Catalog.open(data_dir, mock).clis()
 
 
 def get_ver_list(cli_name, data_dir=None, mock=False):
-    """Return a list of saved CLI versions, if they exist"""
-    if mock:
-        save_path = Path(f"{data_dir}tests/CLIs/{cli_name}")
-    else:
-        save_path = Path(f"{data_dir}CLIs/{cli_name}")
-    # check exists
-    if not save_path.exists():
-        return None
-    # get all versions in directory, that aren't diffs
-    versions = [
-        v_file.name.replace(".yaml", "")
-        for v_file in save_path.iterdir()
-        if "-diff." not in v_file.name and "-comp." not in v_file.name and ".yaml" in v_file.name
-    ] or []
-    try:
-        versions.sort(key=LooseVersion, reverse=True)
-    except ValueError as err:
-        logger.error(f"Encountered an invalid version number. Stopping\n{err}")
-        return None
-    return versions
+    """Return a list of saved CLI versions, newest first, if they exist"""
+    from clix.catalog import Catalog
+
+    return Catalog.open(data_dir, mock).versions(cli_name)
 
 
 def get_latest(cli_name=None, data_dir=None, mock=False):
@@ -107,22 +99,117 @@ def get_previous(cli_name, version, data_dir=None, mock=False):
     return None
 
 
+def yaml_load(stream):
+    """Load yaml from a string or file, with libyaml if it's available"""
+    return yaml.load(stream, Loader=YamlLoader)
+
+
+def yaml_dump(data, stream=None):
+    """Dump data to yaml in clix's block style, with libyaml if it's available"""
+    return yaml.dump(data, stream, Dumper=YamlDumper, default_flow_style=False)
+
+
+def _sidecar_path(c_path):
+    # no ".yaml" in the name, so it isn't mistaken for a version
+    return c_path.with_suffix(".marshal")
+
+
+def _load_sidecar(c_path, raw=None):
+    """Return the data cached next to a yaml file, or None if it's missing or out of date
+
+    A matching mtime and size is trusted outright. Otherwise, as after a fresh checkout,
+    the sidecar is still good if the yaml's hash hasn't changed.
+    """
+    sidecar = _sidecar_path(c_path)
+    try:
+        fmt, mtime, size, digest, data = marshal.loads(sidecar.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if fmt != SIDECAR_FORMAT:
+        return None
+    stat = c_path.stat()
+    if (mtime, size) == (stat.st_mtime_ns, stat.st_size):
+        return data
+    if raw is not None and hashlib.sha256(raw).hexdigest() == digest:
+        # bring the mtime up to date, so next time skips the hash
+        _save_sidecar(c_path, data, raw)
+        return data
+    return None
+
+
+def _save_sidecar(c_path, data, raw):
+    """Cache data next to the yaml file it was loaded from, if marshal can store it"""
+    stat = c_path.stat()
+    record = (
+        SIDECAR_FORMAT,
+        stat.st_mtime_ns,
+        stat.st_size,
+        hashlib.sha256(raw).hexdigest(),
+        data,
+    )
+    try:
+        _sidecar_path(c_path).write_bytes(marshal.dumps(record))
+    except (OSError, ValueError) as err:
+        logger.debug(f"Not caching {c_path}: {err}")
+
+
 def load_cli(cli_name, version, data_dir=None, mock=False):
-    """Load the saved yaml to dict, if the file exists"""
+    """Load the saved yaml to dict, if the file exists
+
+    Loaded data is cached in a marshal sidecar next to the yaml,
+    so loading the same version again skips parsing the yaml.
+    Versions saved to the object store are loaded through their manifest instead,
+    and versions with neither are rebuilt from the tree store, if it has them.
+    """
     if mock:
         c_path = Path(f"{data_dir}tests/CLIs/{cli_name}/{version}.yaml")
     else:
         c_path = Path(f"{data_dir}CLIs/{cli_name}/{version}.yaml")
 
+    if not c_path.exists() and c_path.with_suffix(".tree").exists():
+        c_path = c_path.with_suffix(".tree")
     if not c_path.exists():
+        from clix.store import TreeStore, db_path
+
+        if db_path(data_dir, mock).exists():
+            with TreeStore(data_dir, mock) as store:
+                if (data := store.load(cli_name, version)) is not None:
+                    logger.info(f"Loading CLI from {store.path.absolute()}")
+                    return data or None
         logger.warning(f"No file found at {c_path.absolute()}!")
         return None
     logger.info(f"Loading CLI from {c_path.absolute()}")
-    return yaml.load(c_path.open("r"), Loader=yaml.Loader) or None
-
-
-def save_cli(cli_name, version, cli_dict, data_dir=None, compact=False, mock=False):
-    """Save the dict to yaml"""
+    if (data := _load_sidecar(c_path)) is not None:
+        return data or None
+    raw = c_path.read_bytes()
+    if (data := _load_sidecar(c_path, raw)) is not None:
+        return data or None
+    if c_path.suffix == ".tree":
+        from clix.objects import ObjectStore
+
+        data = ObjectStore(data_dir, mock).load_version(raw)
+    else:
+        data = yaml_load(raw)
+    _save_sidecar(c_path, data, raw)
+    return data or None
+
+
+def save_cli(
+    cli_name,
+    version,
+    cli_dict,
+    data_dir=None,
+    compact=False,
+    mock=False,
+    objects=False,
+    explored=None,
+):
+    """Save the dict to yaml, or to the object store
+
+    Saving one format removes a copy of the same version saved in the other,
+    so load_cli can't find a stale one.
+    explored - The datetime the version was explored, when re-saving an earlier exploration.
+    """
     if mock:
         c_path = Path(
             f"{data_dir}tests/CLIs/{cli_name}/{version}{'-comp' if compact else ''}.yaml"
@@ -130,9 +217,44 @@ def save_cli(cli_name, version, cli_dict, data_dir=None, compact=False, mock=Fal
     else:
         c_path = Path(f"{data_dir}CLIs/{cli_name}/{version}{'-comp' if compact else ''}.yaml")
     c_path.parent.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Saving CLI to {c_path.absolute()}")
-    with c_path.open("w") as c_file:
-        yaml.dump(cli_dict, c_file, default_flow_style=False)
+    if compact:
+        logger.info(f"Saving CLI to {c_path.absolute()}")
+        with c_path.open("w") as c_file:
+            yaml_dump(cli_dict, c_file)
+        return
+    from clix.catalog import Catalog, count_nodes
+    from clix.objects import ObjectStore
+
+    root_name, root = next(iter(cli_dict.items()), (cli_name, {}))
+    nodes = count_nodes(root)
+    if objects:
+        c_path, stale = c_path.with_suffix(".tree"), c_path
+        store = ObjectStore(data_dir, mock)
+        store.save_version(c_path, cli_name, version, root_name, store.put_tree(root), nodes)
+    else:
+        stale = c_path.with_suffix(".tree")
+        logger.info(f"Saving CLI to {c_path.absolute()}")
+        with c_path.open("w") as c_file:
+            yaml_dump(cli_dict, c_file)
+    stale.unlink(missing_ok=True)
+    Catalog.open(data_dir, mock).record(cli_name, version, c_path, nodes, explored)
+
+
+def load_hashes(cli_name, version, data_dir=None):
+    """Load the help text hashes recorded while exploring a version, if they exist"""
+    h_path = Path(f"{data_dir}CLIs/{cli_name}/{version}-hashes.json")
+    if not h_path.exists():
+        logger.warning(f"No help hashes found at {h_path.absolute()}!")
+        return None
+    return json.loads(h_path.read_text())
+
+
+def save_hashes(cli_name, version, hashes, data_dir=None):
+    """Save a mapping of command => help text hash for a version"""
+    h_path = Path(f"{data_dir}CLIs/{cli_name}/{version}-hashes.json")
+    h_path.parent.mkdir(parents=True, exist_ok=True)
+    logger.debug(f"Saving help hashes to {h_path.absolute()}")
+    h_path.write_text(json.dumps(hashes, indent=1, sort_keys=True))
 
 
 def shift_text(text, shift):
@@ -154,38 +276,48 @@ def clean_keywords(name):
     return name
 
 
-async def _run_misc_cmd(key, cmd, host, user, pword):
-    """Run a single command against a remote host"""
+async def _run_misc_cmds(cmds, host, user, pword):
+    """Run several commands against a remote host, over a single connection"""
     conn_args = {"host": host, "username": user, "password": pword, "known_hosts": None}
-    logger.debug(f"Attempting to run command: {cmd}")
+    logger.debug(f"Attempting to run commands: {cmds}")
     async with asyncssh.connect(**conn_args) as conn:
-        result = await conn.run(cmd, check=False)
+        results = await asyncio.gather(*(conn.run(cmd, check=False) for cmd in cmds))
+    outputs = []
+    for cmd, result in zip(cmds, results, strict=True):
         if result.exit_status != 0:
             logger.warning(
                 f"""Recieved non-zero exit code: {result.exit_status}
                  for command: {cmd} \n Result: {result.stderr}"""
             )
             result.stdout = None
-        MODULE_DATA[key] = result.stdout
+        outputs.append(result.stdout)
+    return outputs
 
 
-def run_misc_cmd(key, cmd, host, user, pword):
+def run_misc_cmds(cmds, host, user, pword):
+    """Return the output of each command, or None if we couldn't reach the host"""
     try:
-        asyncio.get_event_loop().run_until_complete(_run_misc_cmd(key, cmd, host, user, pword))
+        return runner.run(_run_misc_cmds(cmds, host, user, pword))
     except (OSError, asyncssh.Error) as exc:
         logger.warning(f"SSH connection failed: {exc}")
+        return None
+
+
+def run_misc_cmd(key, cmd, host, user, pword):
+    outputs = run_misc_cmds([cmd], host, user, pword)
+    if outputs is None:
         return False
+    MODULE_DATA[key] = outputs[0]
     return True
 
 
 def get_max_connections(host, user, pword):
     ses_cmd = "grep MaxSessions /etc/ssh/sshd_config"
     start_cmd = "grep MaxStartups /etc/ssh/sshd_config"
-    ses_key = uuid4()
-    run_misc_cmd(ses_key, ses_cmd, host, user, pword)
-    start_key = uuid4()
-    run_misc_cmd(start_key, start_cmd, host, user, pword)
-    return MODULE_DATA[ses_key].rstrip(), MODULE_DATA[start_key].rstrip()
+    outputs = run_misc_cmds([ses_cmd, start_cmd], host, user, pword)
+    if not outputs or None in outputs:
+        return None
+    return tuple(output.rstrip() for output in outputs)
 
 
 def set_max_sessions(init_val, new_val, host, user, pword):
@@ -0,0 +1,64 @@
+"""An append-only record of scraped commands, used to resume interrupted explorations."""
+import json
+from pathlib import Path
+
+from logzero import logger
+
+
+class CrawlJournal:
+    """Store one json line per scraped command as the crawl progresses
+
+    Each line holds the command prefix and whatever was parsed from its help text,
+    so an interrupted crawl can be replayed without going back to the host.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+
+    def load(self):
+        """Return a dict of prefix => record for everything previously journaled"""
+        records = {}
+        if not self.path.exists():
+            return records
+        with self.path.open() as j_file:
+            for line in j_file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may be incomplete if the previous run died mid-write
+                    logger.debug(f"Skipping malformed journal line: {line!r}")
+                    continue
+                records[record["prefix"]] = record
+        logger.info(f"Loaded {len(records)} journaled commands from {self.path}")
+        return records
+
+    def open(self, resume=False):
+        """Open the journal for writing, discarding old entries unless resuming"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a" if resume else "w")
+        if resume and self._file.tell():
+            with self.path.open("rb") as j_file:
+                j_file.seek(-1, 2)
+                # finish off a line left incomplete, rather than garbling the next one
+                if j_file.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def record(self, prefix, **fields):
+        """Append a single command's results to the journal"""
+        if not self._file:
+            return
+        self._file.write(json.dumps({"prefix": prefix, **fields}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the journal once its contents have been safely saved elsewhere"""
+        self.close()
+        if self.path.exists():
+            logger.debug(f"Removing journal {self.path}")
+            self.path.unlink()
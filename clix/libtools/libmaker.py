@@ -2,8 +2,7 @@
 
 from logzero import logger
 
-from clix import helpers
-from clix.libtools import hammer, subman
+from clix import helpers, plugins
 
 
 class LibMaker:
@@ -23,12 +22,8 @@ class LibMaker:
         if not self.cli_version:
             self.cli_version = helpers.get_latest(self.cli_name, self.data_dir)
 
-        self.MakerClass = None
-        if self.cli_name.lower() == "hammer":
-            self.MakerClass = hammer.HammerMaker
-        elif self.cli_name.lower() == "subscription-manager":
-            self.MakerClass = subman.SubManMaker
-        else:
+        self.MakerClass = plugins.load_libmaker(self.cli_name)
+        if not self.MakerClass:
             logger.warning(f"I don't know how to make a library for {self.cli_name}")
 
     def make_lib(self):
@@ -0,0 +1,107 @@
+"""
+A content-addressed object store for explored trees, in which each subtree is saved once.
+
+Every command is an object holding its options, any other keys like aliases, and the hashes
+of its sub commands, so a command's hash covers its whole subtree, as in a Merkle tree.
+A version is then a small manifest naming its root object. Subtrees that didn't change
+between versions hash the same, so they're only stored once, and can be compared by hash.
+"""
+import hashlib
+import json
+from pathlib import Path
+from uuid import uuid4
+import zlib
+
+from logzero import logger
+
+FORMAT = 1
+MANIFEST_SUFFIX = ".tree"
+
+
+class ObjectStore:
+    """Objects live in CLIs/.objects/<first two hex digits>/<rest of the hash>, compressed"""
+
+    def __init__(self, data_dir=None, mock=False):
+        root = Path(f"{data_dir}tests/CLIs" if mock else f"{data_dir}CLIs")
+        self.path = root / ".objects"
+        self.written = self.reused = 0
+
+    def _object_path(self, digest):
+        return self.path / digest[:2] / digest[2:]
+
+    def put(self, node):
+        """Store a single command, whose sub commands are already hashes, and return its hash"""
+        raw = json.dumps(node, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        o_path = self._object_path(digest)
+        if o_path.exists():
+            self.reused += 1
+            return digest
+        o_path.parent.mkdir(parents=True, exist_ok=True)
+        # written under a unique name first, so concurrent saves never see half an object
+        tmp_path = o_path.with_name(f"{o_path.name}.{uuid4().hex}.tmp")
+        tmp_path.write_bytes(zlib.compress(raw))
+        tmp_path.replace(o_path)
+        self.written += 1
+        return digest
+
+    def put_tree(self, tree):
+        """Store a subtree from the bottom up, returning the hash of its top command"""
+        tree = tree if isinstance(tree, dict) else {}
+        node = {key: val for key, val in tree.items() if key != "sub_commands"}
+        if "sub_commands" in tree:
+            node["sub_commands"] = {
+                name: self.put_tree(subtree)
+                for name, subtree in (tree["sub_commands"] or {}).items()
+            }
+        return self.put(node)
+
+    def get(self, digest, _raw=None):
+        """Rebuild the nested subtree under a hash
+
+        Objects shared within the tree are only read from disk once,
+        but each place they appear still gets its own copy.
+        """
+        raw = _raw if _raw is not None else {}
+        if digest not in raw:
+            raw[digest] = zlib.decompress(self._object_path(digest).read_bytes())
+        node = json.loads(raw[digest])
+        if "sub_commands" in node:
+            node["sub_commands"] = {
+                name: self.get(child, raw) for name, child in node["sub_commands"].items()
+            }
+        return node
+
+    def hashes(self, digest, prefix=""):
+        """Return a dict of command path => subtree hash, for every command under a hash
+
+        Equal hashes mean equal subtrees, so comparing these needs no other reads.
+        """
+        node = json.loads(zlib.decompress(self._object_path(digest).read_bytes()))
+        found = {prefix: digest}
+        for name, child in node.get("sub_commands", {}).items():
+            found.update(self.hashes(child, f"{prefix} {name}".lstrip()))
+        return found
+
+    def save_version(self, m_path, cli_name, version, root_name, root_hash, nodes):
+        """Write the manifest that makes a root hash a saved version"""
+        manifest = {
+            "format": FORMAT,
+            "cli": cli_name,
+            "version": version,
+            "root": {"name": root_name, "hash": root_hash},
+            "nodes": nodes,
+        }
+        m_path = Path(m_path)
+        m_path.parent.mkdir(parents=True, exist_ok=True)
+        m_path.write_text(json.dumps(manifest, indent=1))
+        logger.info(
+            f"Saved {cli_name} {version} as {root_hash[:12]}, "
+            f"writing {self.written} new object(s) and reusing {self.reused}"
+        )
+        return m_path
+
+    def load_version(self, manifest):
+        """Rebuild a saved version's nested dict from its manifest's contents"""
+        root = json.loads(manifest)["root"]
+        return {root["name"]: self.get(root["hash"])}
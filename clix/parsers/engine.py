@@ -0,0 +1,118 @@
+"""
+A single-pass engine that parses help text according to a declarative grammar.
+
+A grammar is a handful of precompiled regexes: the section headers to look for,
+and how to pull a sub command or an option out of a row in each section.
+Parsers describe their cli's help format with a grammar, rather than with their own loop.
+"""
+import re
+
+SUB_COMMANDS, OPTIONS = "sub commands", "options"
+BLANK_LINE = re.compile(r"\n[ \t]*\n")
+HEADER_END = re.compile(r":[ \t]*$", re.MULTILINE)
+
+
+class Grammar:
+    """The shape of a cli's help text
+
+    headers - A mapping of header pattern => section (SUB_COMMANDS or OPTIONS).
+        Patterns must match a whole line, ignoring surrounding whitespace,
+        and header lines must end with a colon.
+    sub_command - A pattern matching a sub command row, with a "name" group and,
+        optionally, an "aliases" group holding the comma-separated aliases after it.
+        It's compiled with re.MULTILINE, so it may anchor itself to a row's start with ^.
+    option - A pattern with a "name" group. Its first match on each row is an option.
+    blank_ends_sub_commands - Whether a blank line ends the sub commands section.
+    skip_options - Option names to leave out, like the help option itself.
+
+    Rather than visiting every line, the row patterns run over a whole section at once.
+    """
+
+    def __init__(
+        self,
+        headers,
+        sub_command,
+        option,
+        blank_ends_sub_commands=True,
+        skip_options=("help",),
+    ):
+        self.sections = list(headers.values())
+        self.headers = re.compile(
+            "|".join(f"(?P<h{index}>{pattern})" for index, pattern in enumerate(headers))
+        )
+        self.sub_command = re.compile(sub_command, re.MULTILINE)
+        self.option = re.compile(option)
+        self.blank_ends_sub_commands = blank_ends_sub_commands
+        self.skip_options = frozenset(skip_options)
+
+    def _sections(self, help_text):
+        """Yield each section's name and text, in the order they appear"""
+        headers = []
+        # only lines ending in a colon can be headers, and those are quick to find
+        for colon in HEADER_END.finditer(help_text):
+            start = help_text.rfind("\n", 0, colon.start()) + 1
+            header = self.headers.fullmatch(help_text[start : colon.start() + 1].strip())
+            if header:
+                headers.append((self.sections[int(header.lastgroup[1:])], start, colon.end()))
+        for index, (section, _, body_start) in enumerate(headers):
+            body_end = headers[index + 1][1] if index + 1 < len(headers) else len(help_text)
+            yield section, help_text[body_start:body_end]
+
+    def _options(self, text):
+        """Yield the name of the first option on each row"""
+        row_end = -1
+        for match in self.option.finditer(text):
+            if match.start() > row_end:
+                row_end = text.find("\n", match.start())
+                if row_end == -1:
+                    row_end = len(text)
+                if match["name"] not in self.skip_options:
+                    yield match["name"]
+
+    def parse(self, help_text):
+        """Return the sub commands, options, and sub command aliases found in help text"""
+        sub_commands, options, aliases = [], [], {}
+        for section, text in self._sections(help_text):
+            if section == OPTIONS:
+                options.extend(self._options(text))
+                continue
+            rows = text
+            if self.blank_ends_sub_commands:
+                rows = BLANK_LINE.split(text.lstrip("\n"), maxsplit=1)[0]
+            for row in self.sub_command.finditer(rows):
+                sub_commands.append(row["name"])
+                if row.groupdict().get("aliases"):
+                    aliases[row["name"]] = [
+                        alias.strip() for alias in row["aliases"].split(",") if alias.strip()
+                    ]
+        return sub_commands, options, aliases
+
+
+class GrammarParser:
+    """A parser whose help format is entirely described by its grammar"""
+
+    grammar = None
+
+    def __init__(self):
+        self._data = {}
+        self.suffix = "--help"
+
+    def yaml_format(self, data):
+        """compile all data into a yaml-compatible dict
+
+        if you want to do any special processing on the data, here is the place
+        """
+        return data
+
+    def process_help(self, help_text):
+        """Return the sub commands, options, and sub command aliases, in a single pass"""
+        return self.grammar.parse(help_text)
+
+    def process_help_text(self, help_text):
+        """Return a list of sub commands and a list of options"""
+        sub_commands, options, _ = self.grammar.parse(help_text)
+        return sub_commands, options
+
+    def process_aliases(self, help_text):
+        """Return a dict of sub command => its aliases"""
+        return self.grammar.parse(help_text)[2]
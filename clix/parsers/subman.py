@@ -5,47 +5,20 @@ Parser classes must currently implement the following methods:
     process_help_text - Returns a list of sub command and a list of options.
     yaml_format - Returns yaml-friendly dict of the compiled data.
 
-Additionally, each parser class must have a suffix
+Additionally, each parser class must have a suffix.
+Most parsers only need to describe their help format with an engine.Grammar.
 """
-from logzero import logger
+from clix.parsers.engine import OPTIONS, SUB_COMMANDS, Grammar, GrammarParser
 
 
-class SubMan:
+class SubMan(GrammarParser):
     """Parser class for subscription-manager"""
 
-    def __init__(self):
-        self._data = {}
-        self.suffix = "--help"
-
-    def yaml_format(self, data):
-        """compile all data into a yaml-compatible dict
-
-        if you want to do any special processing on the data, here is the place
-        """
-        return data
-
-    @staticmethod
-    def process_help_text(help_text):
-        """Iterate through each line of help text and pull into categories"""
-        sub_commands, options, category = [], [], "skip"
-        for line in help_text.splitlines():
-            line = line.strip()  # noqa: PLW2901 - want to clean extra spaces
-            if "help" in line or not line:
-                continue
-            if " Modules:" in line:
-                logger.debug("Changing category to subcommands.")
-                category = "sub commands"
-            elif line and category == "sub commands":
-                sub_commands.append(line.split()[0])
-            elif "--" in line and category == "options":
-                line = line.split("--")[1]  # noqa: PLW2901 - not used downstream
-                options.append(line.split()[0])
-            elif line == "Options:":
-                logger.debug("Changing category to options.")
-                category = "options"
-            elif category == "options":
-                continue  # handle the case of multi-line helps
-            else:
-                category = "skip"
-        logger.debug(f"sub Commands: {sub_commands}, Options: {options}")
-        return sub_commands, options
+    grammar = Grammar(
+        # e.g. "Primary Modules:" and "Other Modules:"
+        headers={r".*\sModules:": SUB_COMMANDS, "Options:": OPTIONS},
+        sub_command=r"^[ \t]*(?P<name>\S+)",
+        option=r"--(?P<name>\S+)",
+        # modules are listed after a blank line
+        blank_ends_sub_commands=False,
+    )
@@ -0,0 +1,58 @@
+"""
+Find parsers and library makers by name, importing only the one that's asked for.
+
+Both are registered as entry points, so other packages can ship their own without forking clix:
+
+    [project.entry-points."clix.parsers"]
+    mycli = "mypackage.parser:MyCLIParser"
+
+    [project.entry-points."clix.libmakers"]
+    mycli = "mypackage.maker:MyCLIMaker"
+
+A parser is a class with a `suffix` and `process_help_text`, like those in clix.parsers.
+A library maker is a class taking `cli_dict`, `cli_name`, `cli_version` and `data_dir`,
+with a `make` method, like those in clix.libtools.
+"""
+from importlib.metadata import EntryPoint, entry_points
+
+from logzero import logger
+
+PARSERS, LIBMAKERS = "clix.parsers", "clix.libmakers"
+# used when clix runs from a source tree, without its own entry points installed
+BUILTINS = {
+    PARSERS: {
+        "argparse": "clix.parsers.argparse:ArgParse",
+        "hammer": "clix.parsers.hammer:Hammer",
+        "subscription-manager": "clix.parsers.subman:SubMan",
+    },
+    LIBMAKERS: {
+        "hammer": "clix.libtools.hammer:HammerMaker",
+        "subscription-manager": "clix.libtools.subman:SubManMaker",
+    },
+}
+
+
+def available(group):
+    """Return a dict of name => entry point for everything registered in a group"""
+    found = {
+        name: EntryPoint(name, value, group) for name, value in BUILTINS.get(group, {}).items()
+    }
+    # installed entry points win, so a package can replace a built-in
+    found.update({entry.name.lower(): entry for entry in entry_points(group=group)})
+    return found
+
+
+def load(group, name):
+    """Import and return the class registered under a name, or None if there isn't one"""
+    if not (entry := available(group).get(name.lower())):
+        return None
+    logger.debug(f"Loading {group} plugin {name} from {entry.value}")
+    return entry.load()
+
+
+def load_parser(name):
+    return load(PARSERS, name)
+
+
+def load_libmaker(name):
+    return load(LIBMAKERS, name)
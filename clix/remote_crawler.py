@@ -0,0 +1,87 @@
+"""
+A self-contained crawler that CLIx uploads to, and runs on, the target host.
+
+It reads json lines with a "path" key from stdin and runs "<path> <suffix>" for each,
+using a pool of worker threads. For every command, it writes a json line with the path,
+stdout, stderr, and exit status. Commands that time out on every try, or can't be run
+at all, also get an error, so every path sent is answered with exactly one line.
+It exits once stdin is closed and every command is done.
+
+This file must only depend on the standard library, and stay compatible with python 3.6.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+WRITE_LOCK = threading.Lock()
+
+
+def _run(path, suffix, timeout=None, retries=0):
+    """Run a single help command, retrying it if it times out, and return its results"""
+    result = {"path": path, "stdout": "", "stderr": "", "status": 124}
+    for attempt in range(retries + 1):
+        try:
+            proc = subprocess.run(  # noqa: UP022 - capture_output needs python 3.7
+                shlex.split(path) + shlex.split(suffix),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,  # noqa: UP021 - text needs python 3.7
+                errors="replace",
+                timeout=timeout,
+                check=False,
+            )
+        except subprocess.TimeoutExpired:
+            result["error"] = "timed out after {}s".format(timeout)  # noqa: UP032 - python 3.6
+            time.sleep(random.uniform(0, min(0.2 * 2**attempt, 10)))
+            continue
+        except OSError as exc:
+            result.update(stderr=str(exc), status=127)
+        else:
+            result.update(stdout=proc.stdout, stderr=proc.stderr, status=proc.returncode)
+        result.pop("error", None)
+        break
+    return result
+
+
+def run_command(path, suffix, timeout=None, retries=0):
+    """Run a single help command and stream its results back, whatever goes wrong"""
+    try:
+        result = _run(path, suffix, timeout, retries)
+    except Exception as exc:
+        # the driver waits for a line per path, even one with an unbalanced quote
+        result = {"path": path, "stdout": "", "stderr": str(exc), "status": 127}
+        result["error"] = "{}: {}".format(type(exc).__name__, exc)  # noqa: UP032 - python 3.6
+    line = json.dumps(result)
+    with WRITE_LOCK:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--suffix", default="--help")
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=0, help="0 waits forever")
+    parser.add_argument("--retries", type=int, default=0)
+    args = parser.parse_args()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for line in sys.stdin:
+            if line.strip():
+                pool.submit(
+                    run_command,
+                    json.loads(line)["path"],
+                    args.suffix,
+                    args.timeout or None,
+                    args.retries,
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""A single event loop, shared by everything a clix invocation runs.
+
+uvloop is used when it's installed, and the standard loop otherwise.
+"""
+import asyncio
+import atexit
+
+from logzero import logger
+
+_LOOP = None
+
+
+def new_event_loop():
+    """Create an event loop, preferring uvloop's"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    logger.debug("Using uvloop's event loop")
+    return uvloop.new_event_loop()
+
+
+def get_loop():
+    """Return the shared event loop, creating it on first use"""
+    global _LOOP  # noqa: PLW0603 - one loop per process is the point
+    if _LOOP is None or _LOOP.is_closed():
+        _LOOP = new_event_loop()
+        asyncio.set_event_loop(_LOOP)
+        atexit.register(close)
+    return _LOOP
+
+
+def run(coro):
+    """Run a coroutine to completion on the shared event loop"""
+    return get_loop().run_until_complete(coro)
+
+
+def close():
+    """Shut down the shared event loop, once nothing else will run on it"""
+    if _LOOP is None or _LOOP.is_closed():
+        return
+    _LOOP.run_until_complete(_LOOP.shutdown_asyncgens())
+    _LOOP.close()
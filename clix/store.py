@@ -0,0 +1,187 @@
+"""An optional SQLite store of explored trees, with one row per command and option."""
+import json
+from pathlib import Path
+import sqlite3
+
+from logzero import logger
+
+from clix import helpers
+from clix.catalog import Catalog
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    cli TEXT NOT NULL,
+    version TEXT NOT NULL,
+    hash TEXT,
+    UNIQUE (cli, version)
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    version_id INTEGER NOT NULL REFERENCES versions (id) ON DELETE CASCADE,
+    parent INTEGER,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    has_options INTEGER NOT NULL,
+    has_sub_commands INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS options (
+    node_id INTEGER NOT NULL REFERENCES nodes (id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nodes_path ON nodes (path, version_id);
+CREATE INDEX IF NOT EXISTS nodes_version ON nodes (version_id);
+CREATE INDEX IF NOT EXISTS options_name ON options (name, node_id);
+CREATE INDEX IF NOT EXISTS options_node ON options (node_id);
+"""
+
+
+def db_path(data_dir=None, mock=False):
+    """Where the store lives: next to the catalog, so its files don't look like a new cli"""
+    return Path(f"{data_dir}tests/CLIs" if mock else f"{data_dir}CLIs") / ".catalog" / "trees.db"
+
+
+class TreeStore:
+    """Keep every explored version's commands and options as indexed rows
+
+    Each command is a node whose path is its command line without the cli's name,
+    like "host create", so the cli itself has an empty path.
+    Anything on a node besides its options and sub commands, like aliases or an error,
+    is kept as json, so the nested dict can be rebuilt exactly.
+    """
+
+    def __init__(self, data_dir=None, mock=False):
+        self.path = db_path(data_dir, mock)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stored_hash(self, cli_name, version):
+        """Return the hash of the yaml a version was stored from, or None if it isn't stored"""
+        row = self.conn.execute(
+            "SELECT hash FROM versions WHERE cli = ? AND version = ?", (cli_name, version)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, cli_name, version, cli_dict, content_hash=None):
+        """Store a version's tree, replacing whatever was stored for it before"""
+        node_rows, option_rows = [], []
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM versions WHERE cli = ? AND version = ?", (cli_name, version)
+            )
+            version_id = self.conn.execute(
+                "INSERT INTO versions (cli, version, hash) VALUES (?, ?, ?)",
+                (cli_name, version, content_hash),
+            ).lastrowid
+            next_id = self.conn.execute("SELECT coalesce(max(id), 0) + 1 FROM nodes").fetchone()[0]
+            # ids are handed out here, so every row can go in with a single executemany
+            stack = [(None, "", name, tree) for name, tree in reversed(cli_dict.items())]
+            while stack:
+                parent, path, name, tree = stack.pop()
+                tree = tree if isinstance(tree, dict) else {}
+                node_id, next_id = next_id, next_id + 1
+                extra = {
+                    key: val for key, val in tree.items() if key not in ("options", "sub_commands")
+                }
+                node_rows.append(
+                    (
+                        node_id,
+                        version_id,
+                        parent,
+                        path,
+                        name,
+                        "options" in tree,
+                        "sub_commands" in tree,
+                        json.dumps(extra) if extra else None,
+                    )
+                )
+                option_rows.extend((node_id, option) for option in tree.get("options") or [])
+                stack.extend(
+                    (node_id, f"{path} {sub}".lstrip(), sub, subtree)
+                    for sub, subtree in reversed((tree.get("sub_commands") or {}).items())
+                )
+            self.conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", node_rows)
+            self.conn.executemany("INSERT INTO options VALUES (?, ?)", option_rows)
+        logger.debug(f"Stored {len(node_rows)} commands of {cli_name} {version} in {self.path}")
+
+    def load(self, cli_name, version):
+        """Rebuild a version's nested dict, as load_cli would return it, or None"""
+        row = self.conn.execute(
+            "SELECT id FROM versions WHERE cli = ? AND version = ?", (cli_name, version)
+        ).fetchone()
+        if not row:
+            return None
+        nodes, cli_dict = {}, {}
+        for node_id, parent, name, has_options, has_subs, extra in self.conn.execute(
+            "SELECT id, parent, name, has_options, has_sub_commands, extra FROM nodes "
+            "WHERE version_id = ? ORDER BY id",
+            row,
+        ):
+            node = json.loads(extra) if extra else {}
+            if has_options:
+                node["options"] = []
+            if has_subs:
+                node["sub_commands"] = {}
+            nodes[node_id] = node
+            siblings = cli_dict if parent is None else nodes[parent]["sub_commands"]
+            siblings[name] = node
+        for node_id, option in self.conn.execute(
+            "SELECT options.node_id, options.name FROM options JOIN nodes ON nodes.id = node_id "
+            "WHERE nodes.version_id = ? ORDER BY options.rowid",
+            row,
+        ):
+            nodes[node_id]["options"].append(option)
+        return cli_dict
+
+    def sync(self, cli_name, data_dir=None, mock=False):
+        """Store any saved versions of a cli that are missing, or changed since stored"""
+        catalog = Catalog.open(data_dir, mock)
+        stored = 0
+        for version in helpers.get_ver_list(cli_name, data_dir, mock) or []:
+            content_hash = catalog.entry(cli_name, version)["hash"]
+            if self.stored_hash(cli_name, version) != content_hash:
+                cli_dict = helpers.load_cli(cli_name, version, data_dir, mock)
+                self.add(cli_name, version, cli_dict or {}, content_hash)
+                stored += 1
+        return stored
+
+    def query(self, cli_name, command=None, option=None):
+        """Return (version, command path, option) rows matching a command and/or an option
+
+        command - The command, without the cli's name. "*" matches anything within it.
+        option - An option name, without its leading dashes. "*" matches here too.
+        """
+        if option:
+            sql = (
+                "SELECT versions.version, nodes.path, options.name FROM nodes "
+                "JOIN options ON options.node_id = nodes.id "
+            )
+        else:
+            sql = "SELECT versions.version, nodes.path, NULL FROM nodes "
+        sql += "JOIN versions ON versions.id = nodes.version_id WHERE versions.cli = ?"
+        params = [cli_name]
+        if command:
+            sql += " AND nodes.path GLOB ?"
+            params.append(" ".join(command.split()))
+        if option:
+            sql += " AND options.name GLOB ?"
+            params.append(option.lstrip("-"))
+        order = " ORDER BY nodes.path, options.rowid" if option else " ORDER BY nodes.path"
+        rows = self.conn.execute(sql + order, params).fetchall()
+        try:
+            rows.sort(key=lambda row: helpers.LooseVersion(row[0]), reverse=True)
+        except ValueError:
+            rows.sort(reverse=True)
+        return rows
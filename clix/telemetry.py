@@ -0,0 +1,225 @@
+"""Record where an exploration spends its time, and export a summary of it."""
+from collections import Counter
+import json
+from pathlib import Path
+import time
+
+from logzero import logger
+
+# upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PHASES = ("connect", "auth", "wait", "exec", "parse")
+SLOWEST = 20
+HEDGE_SAMPLES = 20  # commands to see before trusting the running p95 enough to hedge on
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(round(pct / 100 * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(values):
+    """Reduce a list of timings to the statistics we report"""
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+def histogram(values):
+    """Count the values falling under each bucket's upper bound, prometheus style"""
+    return {str(bound): sum(1 for val in values if val <= bound) for bound in BUCKETS}
+
+
+class CrawlTelemetry:
+    """Per-command timings, sizes, and exit codes for a single exploration"""
+
+    def __init__(self, name, version):
+        self.name = name
+        self.version = version
+        self.commands = []
+        self.timings = {phase: [] for phase in PHASES}
+        self.exit_codes = Counter()
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.retries = 0
+        self.hedges = 0
+        self.failures = {}
+        self._hedge_delay = None
+        self._hedge_samples = 0
+        self._started = time.monotonic()
+        self._last_change = self._started
+        self._busy_time = 0.0  # the integral of in-flight commands over time
+
+    def _track_in_flight(self, change):
+        now = time.monotonic()
+        self._busy_time += self.in_flight * (now - self._last_change)
+        self._last_change = now
+        self.in_flight += change
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def command_started(self):
+        self._track_in_flight(1)
+
+    def command_finished(self):
+        self._track_in_flight(-1)
+
+    def record_command(self, command, wait, duration, stdout, stderr, exit_status):
+        """Record a single completed command"""
+        n_bytes = len(stdout.encode()) + len(stderr.encode())
+        self.commands.append(
+            {
+                "command": command,
+                "wait": wait,
+                "exec": duration,
+                "bytes": n_bytes,
+                "exit_status": exit_status,
+            }
+        )
+        self.timings["wait"].append(wait)
+        self.timings["exec"].append(duration)
+        self.exit_codes[exit_status] += 1
+        self.bytes_received += n_bytes
+
+    def record_retry(self):
+        self.retries += 1
+
+    def record_hedge(self):
+        self.hedges += 1
+
+    def record_failure(self, command, error):
+        self.failures[command] = error
+
+    def hedge_delay(self):
+        """Return the running p95 of command latency, or None until enough commands ran
+
+        The percentile is only recomputed every HEDGE_SAMPLES commands, to keep this cheap.
+        """
+        execs = self.timings["exec"]
+        if len(execs) >= self._hedge_samples + HEDGE_SAMPLES:
+            self._hedge_samples = len(execs)
+            self._hedge_delay = percentile(sorted(execs), 95)
+        return self._hedge_delay
+
+    def record_parse(self, duration):
+        self.timings["parse"].append(duration)
+
+    def record_connection(self, connect, auth):
+        """Record how long a new connection took to establish, then authenticate"""
+        self.timings["connect"].append(connect)
+        self.timings["auth"].append(auth)
+
+    def summary(self):
+        """Compile everything recorded into a json-friendly dict"""
+        self._track_in_flight(0)
+        wall_time = self._last_change - self._started
+        slowest = sorted(self.commands, key=lambda cmd: cmd["exec"], reverse=True)[:SLOWEST]
+        return {
+            "cli": self.name,
+            "version": self.version,
+            "wall_time": wall_time,
+            "commands": len(self.commands),
+            "bytes_received": self.bytes_received,
+            "exit_codes": {str(code): count for code, count in self.exit_codes.items()},
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "failures": self.failures,
+            "phases": {phase: summarize(values) for phase, values in self.timings.items()},
+            "histograms": {phase: histogram(values) for phase, values in self.timings.items()},
+            "concurrency": {
+                "peak": self.peak_in_flight,
+                "mean": self._busy_time / wall_time if wall_time else 0.0,
+            },
+            "slowest": slowest,
+        }
+
+    def _prometheus(self, summary):
+        """Render the summary in prometheus' textfile exposition format"""
+        labels = f'cli="{self.name}",version="{self.version}"'
+        lines = [
+            "# HELP clix_explore_seconds Time spent in each phase of exploration.",
+            "# TYPE clix_explore_seconds histogram",
+        ]
+        for phase, stats in summary["phases"].items():
+            lines.extend(
+                f'clix_explore_seconds_bucket{{{labels},phase="{phase}",le="{bound}"}} {count}'
+                for bound, count in summary["histograms"][phase].items()
+            )
+            lines.extend(
+                [
+                    f'clix_explore_seconds_bucket{{{labels},phase="{phase}",le="+Inf"}} '
+                    f"{stats['count']}",
+                    f'clix_explore_seconds_sum{{{labels},phase="{phase}"}} {stats["total"]}',
+                    f'clix_explore_seconds_count{{{labels},phase="{phase}"}} {stats["count"]}',
+                ]
+            )
+        lines.extend(
+            [
+                "# HELP clix_explore_quantile_seconds Latency quantiles of each phase.",
+                "# TYPE clix_explore_quantile_seconds gauge",
+            ]
+        )
+        lines.extend(
+            f'clix_explore_quantile_seconds{{{labels},phase="{phase}",'
+            f'quantile="0.{quantile[1:]}"}} {stats[quantile]}'
+            for phase, stats in summary["phases"].items()
+            for quantile in ("p50", "p95", "p99")
+        )
+        lines.extend(
+            [
+                "# HELP clix_explore_commands_total Commands run, by exit status.",
+                "# TYPE clix_explore_commands_total counter",
+                *(
+                    f'clix_explore_commands_total{{{labels},exit_status="{code}"}} {count}'
+                    for code, count in summary["exit_codes"].items()
+                ),
+                "# HELP clix_explore_retries_total Commands retried after a transient failure.",
+                "# TYPE clix_explore_retries_total counter",
+                f"clix_explore_retries_total{{{labels}}} {summary['retries']}",
+                "# HELP clix_explore_hedges_total Duplicate commands sent to cut tail latency.",
+                "# TYPE clix_explore_hedges_total counter",
+                f"clix_explore_hedges_total{{{labels}}} {summary['hedges']}",
+                "# HELP clix_explore_failures_total Commands given up on after every retry.",
+                "# TYPE clix_explore_failures_total counter",
+                f"clix_explore_failures_total{{{labels}}} {len(summary['failures'])}",
+                "# HELP clix_explore_bytes_received_total Bytes of output received.",
+                "# TYPE clix_explore_bytes_received_total counter",
+                f"clix_explore_bytes_received_total{{{labels}}} {summary['bytes_received']}",
+                "# HELP clix_explore_concurrency Commands running at once.",
+                "# TYPE clix_explore_concurrency gauge",
+                f'clix_explore_concurrency{{{labels},stat="peak"}} '
+                f"{summary['concurrency']['peak']}",
+                f'clix_explore_concurrency{{{labels},stat="mean"}} '
+                f"{summary['concurrency']['mean']}",
+                "# HELP clix_explore_wall_seconds Total time spent exploring.",
+                "# TYPE clix_explore_wall_seconds gauge",
+                f"clix_explore_wall_seconds{{{labels}}} {summary['wall_time']}",
+            ]
+        )
+        return "\n".join(lines) + "\n"
+
+    def save(self, log_dir="logs"):
+        """Write the summary as json, and as a prometheus textfile, to the log directory"""
+        summary = self.summary()
+        base = Path(log_dir) / f"explore-{self.name}-{self.version}".replace("/", "_")
+        base.parent.mkdir(parents=True, exist_ok=True)
+        base.parent.joinpath(f"{base.name}.json").write_text(json.dumps(summary, indent=2))
+        base.parent.joinpath(f"{base.name}.prom").write_text(self._prometheus(summary))
+        exec_stats = summary["phases"]["exec"]
+        logger.info(
+            f"Ran {summary['commands']} commands in {summary['wall_time']:.1f}s "
+            f"(exec p50 {exec_stats['p50']:.2f}s, p95 {exec_stats['p95']:.2f}s, "
+            f"peak concurrency {summary['concurrency']['peak']})."
+        )
+        logger.info(f"Saved crawl telemetry to {base}.json and {base}.prom")
+        return summary
@@ -0,0 +1,162 @@
+"""
+Provides classes that run commands on behalf of the explorer.
+
+Transport classes must currently implement the following methods:
+    run - Coroutine that runs a command and returns an object with
+          stdout, stderr, and exit_status attributes.
+    close - Coroutine that releases any resources held by the transport.
+"""
+import asyncio
+import gzip
+import json
+from pathlib import Path
+import random
+import shlex
+import time
+
+from logzero import logger
+
+from clix.connections import ConnectionPool
+
+
+class CommandResult:
+    """The outcome of a command run by a non-ssh transport"""
+
+    def __init__(self, stdout="", stderr="", exit_status=0):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_status = exit_status
+
+
+class SSHTransport:
+    """Run commands on a remote host over a pool of multiplexed ssh connections"""
+
+    def __init__(self, conn_args, pool_size=2, channels_per_conn=10, telemetry=None):
+        self.pool = ConnectionPool(conn_args, pool_size, channels_per_conn, telemetry)
+
+    async def run(self, command):
+        return await self.pool.run(command)
+
+    async def close(self):
+        await self.pool.close()
+
+
+class LocalTransport:
+    """Run commands as local subprocesses, optionally behind an exec prefix
+
+    The prefix lets you reach a cli installed in a local container,
+    e.g. `podman exec my-container`.
+    """
+
+    def __init__(self, exec_prefix=None):
+        self.exec_prefix = shlex.split(exec_prefix) if exec_prefix else []
+
+    async def run(self, command):
+        try:
+            args = [*self.exec_prefix, *shlex.split(command)]
+        except ValueError as exc:
+            # like an unbalanced quote in a sub command parsed from a wrapped description
+            logger.warning(f"Unable to split {command!r}: {exc}")
+            return CommandResult(stderr=str(exc), exit_status=127)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as exc:
+            logger.warning(f"Unable to run {args[0]}: {exc}")
+            return CommandResult(stderr=str(exc), exit_status=127)
+        try:
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            # the command timed out, or lost a hedge, so don't leave it running
+            proc.kill()
+            await proc.wait()
+            raise
+        return CommandResult(
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace"),
+            exit_status=proc.returncode,
+        )
+
+    async def close(self):
+        pass
+
+
+class RecordingTransport:
+    """Run commands through another transport, recording every result to a gzipped archive
+
+    The archive holds one json line per command, with its output, exit status,
+    and how long it took, so ReplayTransport can serve the crawl again later.
+    """
+
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.path, "wt")
+        self.recorded = 0
+
+    async def run(self, command):
+        start = time.monotonic()
+        result = await self.transport.run(command)
+        record = {
+            "command": command,
+            "stdout": result.stdout or "",
+            "stderr": result.stderr or "",
+            "exit_status": result.exit_status,
+            "duration": time.monotonic() - start,
+        }
+        self._file.write(json.dumps(record) + "\n")
+        self.recorded += 1
+        return result
+
+    async def close(self):
+        await self.transport.close()
+        self._file.close()
+        logger.info(f"Recorded {self.recorded} commands to {self.path}")
+
+
+class ReplayTransport:
+    """Serve commands from an archive made by RecordingTransport, without touching a host
+
+    `latency` is either None for instant answers, "recorded" to wait as long as each
+    command originally took, or a number of seconds to wait on average.
+    """
+
+    def __init__(self, path, latency=None):
+        self.path = Path(path)
+        self.latency = latency if latency in (None, "recorded") else float(latency)
+        self.records = {}
+        with gzip.open(self.path, "rt") as archive:
+            for line in archive:
+                record = json.loads(line)
+                previous = self.records.get(record["command"])
+                # a retried command may be recorded more than once, so prefer a success
+                if previous is None or previous["exit_status"] != 0:
+                    self.records[record["command"]] = record
+        self.misses = 0
+        logger.info(f"Loaded {len(self.records)} recorded commands from {self.path}")
+
+    def _delay(self, record):
+        if self.latency == "recorded":
+            return record["duration"]
+        if self.latency:
+            return random.uniform(0.5, 1.5) * self.latency
+        return 0
+
+    async def run(self, command):
+        record = self.records.get(command)
+        if record is None:
+            self.misses += 1
+            logger.warning(f"{command} is not in the recording {self.path}")
+            return CommandResult(stderr="not recorded", exit_status=127)
+        if delay := self._delay(record):
+            await asyncio.sleep(delay)
+        return CommandResult(record["stdout"], record["stderr"], record["exit_status"])
+
+    async def close(self):
+        if self.misses:
+            logger.warning(f"{self.misses} command(s) were missing from the recording.")
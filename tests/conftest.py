@@ -0,0 +1,32 @@
+import gzip
+import json
+
+import pytest
+
+from clix.benchmark.server import SyntheticCLI
+
+
+def _record(cli, path, archive):
+    """Record the help of every command under a path, as a crawl would"""
+    archive.write(
+        json.dumps(
+            {
+                "command": " ".join([*path, "--help"]),
+                "stdout": cli.help_text(path),
+                "stderr": "",
+                "exit_status": 0,
+                "duration": 0,
+            }
+        )
+        + "\n"
+    )
+    for sub_command in cli.sub_commands(path):
+        _record(cli, [*path, sub_command], archive)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / "hammer.jsonl.gz"
+    with gzip.open(path, "wt") as archive:
+        _record(SyntheticCLI("hammer", depth=2, fanout=2, options=2), ["hammer"], archive)
+    return path
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+from clix import runner
+from clix.benchmark.server import SyntheticCLI
+from clix.explore import AsyncExplorer
+from clix.transports import CommandResult, LocalTransport
+
+CLI = SyntheticCLI("hammer", depth=2, fanout=3, options=2)
+FAKE_HAMMER = """\
+#!{python}
+import os
+import sys
+
+from clix.benchmark.server import SyntheticCLI
+
+path = ["hammer", *sys.argv[1:-1]]
+help_text = SyntheticCLI("hammer", depth=2, fanout=3, options=2).help_text(path)
+if " ".join(path) == os.environ.get("FAKE_HAMMER_FAIL"):
+    # dies part way through its help text
+    print(help_text[:40], end="")
+    sys.exit(3)
+print(help_text, end="")
+"""
+
+
+@pytest.fixture
+def explorer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    hammer = tmp_path / "bin" / "hammer"
+    hammer.parent.mkdir()
+    hammer.write_text(FAKE_HAMMER.format(python=sys.executable))
+    hammer.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{hammer.parent}{os.pathsep}{os.environ['PATH']}")
+    return AsyncExplorer(
+        name="hammer",
+        version="1.0",
+        parser="hammer",
+        data_dir=f"{tmp_path}/",
+        transport="local",
+        batch=True,
+        batch_size=2,
+    )
+
+
+def test_batch_splits_on_the_delimiter(explorer):
+    help_texts = runner.run(explorer._run_batch("hammer", ["sub0", "sub1", "sub2"]))
+    assert help_texts == {sub: CLI.help_text(["hammer", sub]) for sub in help_texts}
+    assert list(help_texts) == ["sub0", "sub1", "sub2"]
+
+
+def test_batch_command_fails_part_way(explorer, monkeypatch):
+    """A failing command keeps only its own output, and the rest of the batch still splits"""
+    monkeypatch.setenv("FAKE_HAMMER_FAIL", "hammer sub1")
+    help_texts = runner.run(explorer._run_batch("hammer", ["sub0", "sub1", "sub2"]))
+    assert help_texts["sub0"] == CLI.help_text(["hammer", "sub0"])
+    assert help_texts["sub1"] == CLI.help_text(["hammer", "sub1"])[:40]
+    assert help_texts["sub2"] == CLI.help_text(["hammer", "sub2"])
+
+
+def test_batch_cut_short(explorer, monkeypatch):
+    """Commands whose output never arrived are left for single commands to fetch"""
+    local_run = LocalTransport.run
+
+    async def cut_short(transport, command):
+        result = await local_run(transport, command)
+        # the exec dies right after the first command's delimiter
+        first_delim = result.stdout.index("\nCLIX-")
+        end = result.stdout.index("\n", first_delim + 1) + 1
+        return CommandResult(result.stdout[:end], exit_status=137)
+
+    monkeypatch.setattr(LocalTransport, "run", cut_short)
+    help_texts = runner.run(explorer._run_batch("hammer", ["sub0", "sub1", "sub2"]))
+    assert help_texts == {"sub0": CLI.help_text(["hammer", "sub0"])}
+
+
+def test_batched_crawl_matches_single_commands(explorer, monkeypatch):
+    local_run, commands = LocalTransport.run, []
+
+    async def run(transport, command):
+        commands.append(command)
+        return await local_run(transport, command)
+
+    monkeypatch.setattr(LocalTransport, "run", run)
+    explorer.explore()
+    batched = explorer._data
+    # the root, then two batches of sub commands under each of the root and its three subs
+    assert len(commands) == 1 + 2 * (1 + CLI.fanout)
+    assert all(command.startswith("sh -c ") for command in commands[1:])
+    single = AsyncExplorer(
+        name="hammer", version="2.0", parser="hammer", data_dir="./", transport="local"
+    )
+    single.explore()
+    assert batched == single._data
+    assert len(batched["sub_commands"]) == CLI.fanout
@@ -0,0 +1,36 @@
+import json
+
+from clix.benchmark.parsers import (
+    BASELINE,
+    benchmark_page,
+    find_regressions,
+    load_corpus,
+    run_suite,
+)
+
+ROW = {"page": "page", "sub_commands": 3, "options": 5, "relative_speed": 1.0, "alloc_kib": 10.0}
+
+
+def test_find_regressions():
+    assert find_regressions([{**ROW, "relative_speed": 0.8}], [ROW]) == []
+    slower, bigger = {**ROW, "relative_speed": 0.5}, {**ROW, "alloc_kib": 20.0}
+    assert "down from 1.000x" in find_regressions([slower], [ROW])[0]
+    assert "up from 10.0" in find_regressions([bigger], [ROW])[0]
+    assert find_regressions([{**ROW, "options": 4}], [ROW]) == [
+        "page: found 4 options, instead of 5"
+    ]
+
+
+def test_parsers_against_baseline():
+    """Parsing the corpus hasn't slowed down, grown its allocations, or changed its results"""
+    baseline = json.loads(BASELINE.read_text())
+    rows = run_suite(repeat=2)
+    assert [row["page"] for row in rows] == [row["page"] for row in baseline]
+    if regressed := {line.split(":")[0] for line in find_regressions(rows, baseline)}:
+        # a short run is sometimes unlucky, so confirm what it found with a full one
+        corpus = {name: (parser, text) for name, parser, text in load_corpus()}
+        rows = [
+            benchmark_page(row["page"], *corpus[row["page"]]) if row["page"] in regressed else row
+            for row in rows
+        ]
+    assert find_regressions(rows, baseline) == []
@@ -0,0 +1,67 @@
+from click.testing import CliRunner
+import pytest
+
+from clix import helpers
+from clix.commands import cli
+from clix.explore import AsyncExplorer
+
+
+def _explore_many(tmp_path, manifest):
+    m_path = tmp_path / "targets.yaml"
+    m_path.write_text(manifest)
+    return CliRunner().invoke(
+        cli, ["explore-many", "-m", str(m_path), "--data-dir", f"{tmp_path}/"]
+    )
+
+
+@pytest.mark.parametrize(
+    ("manifest", "error"),
+    [
+        (
+            "targets:\n"
+            "  - {cli_name: hammer, transport: local}\n"
+            "  - {cli_name: hammer, transport: local}\n",
+            "needs a version",
+        ),
+        (
+            "targets:\n  - {cli_name: hammer, transport: local, version: 6.10}\n",
+            "as the number 6.1",
+        ),
+        (
+            "defaults: {transport: local}\n"
+            "targets:\n"
+            "  - {cli_name: hammer, version: '6.15'}\n"
+            "  - {cli_name: sat6, version: '6.15'}\n",
+            "listed more than once",
+        ),
+        (
+            "targets:\n  - {cli_name: hammer, version: '6.15', target_host: sat.example.com}\n",
+            "requires both target_host and auth",
+        ),
+    ],
+)
+def test_explore_many_rejects_targets(tmp_path, monkeypatch, manifest, error):
+    """Bad targets are reported before anything is explored"""
+    monkeypatch.setattr(AsyncExplorer, "explore_all", pytest.fail)
+    result = _explore_many(tmp_path, manifest)
+    assert result.exit_code == 2  # noqa: PLR2004 - click's usage error
+    assert error in " ".join(result.output.replace("│", "").split())
+
+
+def test_explore_many_saves_each_target(tmp_path, monkeypatch):
+    def explore_all(explorers, max_total=None):
+        for explorer in explorers:
+            explorer._data = {"options": [f"--{explorer.version}"]}
+            explorer.finished = explorer.version != "3.0"
+
+    monkeypatch.setattr(AsyncExplorer, "explore_all", explore_all)
+    result = _explore_many(
+        tmp_path,
+        "defaults: {transport: local}\n"
+        "targets:\n"
+        "  - {cli_name: hammer, version: '1.0'}\n"
+        "  - {cli_name: hammer, version: '2.0'}\n"
+        "  - {cli_name: hammer, version: '3.0'}\n",
+    )
+    assert result.exit_code == 0, result.output
+    assert helpers.get_ver_list("hammer", f"{tmp_path}/") == ["2.0", "1.0"]
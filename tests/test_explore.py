@@ -0,0 +1,154 @@
+import sys
+
+import pytest
+
+from clix import helpers
+from clix.explore import AsyncExplorer
+
+SSHD_MAX_SESSIONS = 5
+
+FAKE_CLI = """\
+import sys
+from clix.benchmark.server import SyntheticCLI
+
+help_text = SyntheticCLI("hammer", depth=2, fanout=2, options=2).help_text(sys.argv[1:-1])
+print(help_text or "Unknown command")
+sys.exit(0 if help_text else 64)
+"""
+
+
+@pytest.fixture
+def fake_cli(tmp_path):
+    path = tmp_path / "fake_cli.py"
+    path.write_text(FAKE_CLI)
+    return f"{sys.executable} {path}"
+
+
+def test_explore_all_local_and_replay(tmp_path, monkeypatch, recording, fake_cli):
+    """Targets that never touch sshd still share the loop explore_all runs them on"""
+    monkeypatch.chdir(tmp_path)  # telemetry is written to ./logs
+    data_dir = f"{tmp_path}/"
+    explorers = [
+        AsyncExplorer(
+            name="hammer",
+            version="1.0",
+            parser="hammer",
+            data_dir=data_dir,
+            transport="replay",
+            replay=recording,
+        ),
+        AsyncExplorer(
+            name="hammer",
+            version="2.0",
+            parser="hammer",
+            data_dir=data_dir,
+            transport="local",
+            exec_prefix=fake_cli,
+        ),
+    ]
+    AsyncExplorer.explore_all(explorers, max_total=4)
+    for explorer in explorers:
+        assert explorer.save_results()
+    replayed = helpers.load_cli("hammer", "1.0", data_dir)
+    assert replayed == helpers.load_cli("hammer", "2.0", data_dir)
+    assert sorted(replayed["hammer"]["sub_commands"]) == ["sub0", "sub1"]
+
+
+def test_failed_stream_crawl_is_resumable(tmp_path, monkeypatch, recording):
+    """A crawl that dies part way keeps its journal, and saves nothing until it's resumed"""
+    monkeypatch.chdir(tmp_path)
+    data_dir = f"{tmp_path}/"
+
+    async def dies_part_way(explorer):
+        await explorer.scrape_help("hammer")
+        raise OSError("Connection lost")
+
+    crawl_queue = AsyncExplorer._crawl_queue
+    monkeypatch.setattr(AsyncExplorer, "_crawl_queue", dies_part_way)
+    options = {
+        "name": "hammer",
+        "version": "1.0",
+        "parser": "hammer",
+        "data_dir": data_dir,
+        "replay": recording,
+        "stream": True,
+    }
+    explorer = AsyncExplorer(**options)
+    explorer.explore()
+    assert not explorer.finished
+    assert explorer.save_results() is None
+    assert explorer.journal.path.exists()
+    assert not helpers.get_ver_list("hammer", data_dir)
+
+    monkeypatch.setattr(AsyncExplorer, "_crawl_queue", crawl_queue)
+    explorer = AsyncExplorer(**options, resume=True)
+    explorer.explore()
+    assert explorer.finished
+    assert explorer.save_results()
+    assert not explorer.journal.path.exists()
+    resumed = helpers.load_cli("hammer", "1.0", data_dir)
+    assert sorted(resumed["hammer"]["sub_commands"]) == ["sub0", "sub1"]
+
+
+def test_sshd_revert_while_recording(tmp_path, monkeypatch):
+    """A recorded ssh crawl still shrinks its pool when sshd can't be given more sessions"""
+    monkeypatch.setattr(
+        helpers,
+        "get_max_connections",
+        lambda *_: [f"MaxSessions {SSHD_MAX_SESSIONS}", "MaxStartups 10"],
+    )
+    monkeypatch.setattr(helpers, "set_max_sessions", lambda *_: None)
+    monkeypatch.setattr(helpers, "set_max_starts", lambda *_: None)
+    explorer = AsyncExplorer(
+        name="hammer",
+        version="1.0",
+        parser="hammer",
+        host="sathost",
+        data_dir=f"{tmp_path}/",
+        record=tmp_path / "hammer.jsonl.gz",
+    )
+    explorer._raise_max_sessions()
+    assert explorer.channels_per_conn == SSHD_MAX_SESSIONS
+    assert explorer.transport.transport.pool.channels_per_conn == SSHD_MAX_SESSIONS
+    assert not explorer.adjust_max
+
+
+def test_dedupe_duplicate_siblings(tmp_path, monkeypatch, recording):
+    """Siblings are matched even when their parent's help has the same shape as theirs"""
+    monkeypatch.chdir(tmp_path)
+    results, crawled = {}, {}
+    for dedupe in (False, True):
+        explorer = AsyncExplorer(
+            name="hammer",
+            version=f"dedupe-{dedupe}",
+            parser="hammer",
+            data_dir=f"{tmp_path}/",
+            replay=recording,
+            dedupe=dedupe,
+        )
+        explorer.explore()
+        crawled[dedupe] = set(explorer._hashes)
+        explorer.save_results()
+        results[dedupe] = helpers.load_cli("hammer", explorer.version, f"{tmp_path}/")
+    assert explorer._duplicates == {"hammer sub1": "hammer sub0"}
+    assert crawled[False] - crawled[True] == {"hammer sub1 sub0", "hammer sub1 sub1"}
+    assert results[True] == results[False]
+
+
+def test_baseline_below(tmp_path):
+    explorer = AsyncExplorer(name="hammer", parser="hammer", data_dir=f"{tmp_path}/")
+    paths = [
+        "hammer",
+        "hammer host",
+        "hammer host create",
+        "hammer host interface list",
+        "hammer host-collection",
+        "hammer host-collection list",
+        "hammer hosts",
+        "hammer hostgroup list",
+    ]
+    explorer._baseline_paths = sorted(paths)
+    for prefix in paths:
+        assert explorer._baseline_below(prefix) == sorted(
+            path for path in paths if path.startswith(f"{prefix} ")
+        )
@@ -0,0 +1,84 @@
+from clix import helpers
+from clix.explore import AsyncExplorer
+from clix.journal import CrawlJournal
+from clix.transports import ReplayTransport
+
+
+def test_journal_round_trip(tmp_path):
+    journal = CrawlJournal(tmp_path / "1.0.journal")
+    journal.open()
+    journal.record("hammer", sub_commands=["host"], options=["--help"], hash="a")
+    journal.close()
+    # a run that died mid-write leaves half a line behind
+    with journal.path.open("a") as j_file:
+        j_file.write('{"prefix": "hammer ho')
+    journal.open(resume=True)
+    journal.record("hammer host", sub_commands=[], options=["--name"], hash="b")
+    journal.close()
+    records = journal.load()
+    assert list(records) == ["hammer", "hammer host"]
+    assert records["hammer host"]["options"] == ["--name"]
+
+    journal.open()  # not resuming starts over
+    journal.close()
+    assert journal.load() == {}
+    journal.remove()
+    assert not journal.path.exists()
+
+
+def test_interrupted_crawl_resumes(tmp_path, monkeypatch, recording):
+    """A resumed crawl reuses what was journaled, and retries only what failed"""
+    monkeypatch.chdir(tmp_path)
+    data_dir = f"{tmp_path}/"
+    calls, replay = [], ReplayTransport.run
+    broken = {"hammer sub1 --help"}
+
+    async def run(transport, command):
+        calls.append(command)
+        if command in broken:
+            raise OSError("Connection reset")
+        return await replay(transport, command)
+
+    async def interrupted(explorer):
+        for prefix in ("hammer", "hammer sub0", "hammer sub1"):
+            await explorer.scrape_help(prefix)
+        raise OSError("Connection lost")
+
+    monkeypatch.setattr(ReplayTransport, "run", run)
+    crawl_queue = AsyncExplorer._crawl_queue
+    monkeypatch.setattr(AsyncExplorer, "_crawl_queue", interrupted)
+    options = {
+        "name": "hammer",
+        "version": "1.0",
+        "parser": "hammer",
+        "data_dir": data_dir,
+        "replay": recording,
+        "retries": 0,
+    }
+    explorer = AsyncExplorer(**options)
+    explorer.explore()
+    assert not explorer.finished
+    assert "error" in explorer.journal.load()["hammer sub1"]
+
+    broken.clear()
+    calls.clear()
+    monkeypatch.setattr(AsyncExplorer, "_crawl_queue", crawl_queue)
+    explorer = AsyncExplorer(**options, resume=True)
+    explorer.explore()
+    assert explorer.finished
+    assert sorted(calls) == [
+        "hammer sub0 sub0 --help",
+        "hammer sub0 sub1 --help",
+        "hammer sub1 --help",
+        "hammer sub1 sub0 --help",
+        "hammer sub1 sub1 --help",
+    ]
+    explorer.save_results()
+    assert not explorer.journal.path.exists()
+
+    explorer = AsyncExplorer(**{**options, "version": "2.0"})
+    explorer.explore()
+    explorer.save_results()
+    assert helpers.load_cli("hammer", "1.0", data_dir) == helpers.load_cli(
+        "hammer", "2.0", data_dir
+    )
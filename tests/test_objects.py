@@ -0,0 +1,83 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from clix import helpers
+from clix.catalog import Catalog
+from clix.commands import cli
+from clix.objects import ObjectStore
+
+HOST = {
+    "options": ["help"],
+    "sub_commands": {
+        "create": {"options": ["name", "build"]},
+        "delete": {"options": ["id"], "aliases": ["destroy"]},
+    },
+}
+TREE = {
+    "hammer": {
+        "options": ["verbose"],
+        "sub_commands": {
+            "host": HOST,
+            "hostgroup": HOST,
+            "broken": {"error": "Unknown command"},
+            "empty": {"sub_commands": {}},
+        },
+    }
+}
+CHANGED = {
+    "hammer": {
+        "options": ["verbose"],
+        "sub_commands": {"host": HOST, "hostgroup": {"options": ["help", "name"]}},
+    }
+}
+
+
+def _objects(data_dir):
+    return sorted(path for path in Path(f"{data_dir}CLIs/.objects").rglob("*") if path.is_file())
+
+
+def test_object_store_round_trip(tmp_path):
+    """Trees load back the same, and each distinct subtree is only written once"""
+    store = ObjectStore(f"{tmp_path}/")
+    root = store.put_tree(TREE["hammer"])
+    assert store.get(root) == TREE["hammer"]
+    # hammer, host (once for both siblings), create, delete, broken and empty
+    assert (store.written, store.reused) == (6, 3)
+    assert len(_objects(f"{tmp_path}/")) == store.written
+    assert store.put_tree(TREE["hammer"]) == root
+
+    hashes = store.hashes(root, "hammer")
+    assert hashes["hammer"] == root
+    assert hashes["hammer host"] == hashes["hammer hostgroup"]
+    assert hashes["hammer host create"] == hashes["hammer hostgroup create"]
+    changed = store.hashes(store.put_tree(CHANGED["hammer"]), "hammer")
+    assert changed["hammer host"] == hashes["hammer host"]
+    assert changed["hammer hostgroup"] != hashes["hammer hostgroup"]
+
+
+def test_pack(tmp_path, monkeypatch):
+    """Packed versions replace their yaml, load back the same, and keep when they were explored"""
+    monkeypatch.chdir(tmp_path)
+    data_dir = f"{tmp_path}/"
+    explored = datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC)
+    for version, tree in (("1.0", TREE), ("2.0", CHANGED)):
+        helpers.save_cli("hammer", version, tree, data_dir, explored=explored)
+
+    result = CliRunner().invoke(cli, ["pack", "-n", "hammer", "--data-dir", data_dir])
+    assert result.exit_code == 0, result.output
+    assert "Packed hammer 1.0" in result.output
+    assert "Packed hammer 2.0" in result.output
+    cli_dir = tmp_path / "CLIs" / "hammer"
+    for version, tree in (("1.0", TREE), ("2.0", CHANGED)):
+        assert not (cli_dir / f"{version}.yaml").exists()
+        assert (cli_dir / f"{version}.tree").exists()
+        for sidecar in cli_dir.glob("*.marshal"):  # so the objects themselves are read
+            sidecar.unlink()
+        assert helpers.load_cli("hammer", version, data_dir) == tree
+        entry = Catalog.open(data_dir).entry("hammer", version)
+        assert entry["explored"] == explored.isoformat(timespec="seconds")
+    assert helpers.get_ver_list("hammer", data_dir) == ["2.0", "1.0"]
+    # 2.0 only added its own root and its new hostgroup
+    assert len(_objects(data_dir)) == 8  # noqa: PLR2004 - 6 objects for 1.0, 2 more for 2.0
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+from clix import plugins
+from clix.benchmark.parsers import load_corpus
+from clix.explore import process_help
+
+# what the hammer, argparse and subscription-manager parsers found in the corpus,
+# before they were rebuilt on the grammar engine
+LEGACY = json.loads((Path(__file__).parent / "data" / "legacy-parsers.json").read_text())
+CORPUS = load_corpus()
+
+
+def _summary(values):
+    """Sorted values, or their count and digest when there are too many to read in a diff"""
+    values = sorted(values)
+    if len(values) <= 100:  # noqa: PLR2004 - same cutoff the legacy results were written with
+        return values
+    return {"count": len(values), "sha256": hashlib.sha256("\n".join(values).encode()).hexdigest()}
+
+
+@pytest.mark.parametrize(("page", "parser", "text"), CORPUS, ids=[page for page, _, _ in CORPUS])
+def test_engine_matches_legacy_parsers(page, parser, text):
+    """The grammar engine reads the corpus the same way the parsers it replaced did"""
+    sub_commands, options, aliases = process_help(plugins.load_parser(parser)(), text)
+    legacy = LEGACY[page]
+    assert _summary(sub_commands) == legacy["sub_commands"]
+    # the old parsers skipped every row mentioning help, rather than just the help option
+    assert _summary(option for option in options if "help" not in option) == legacy["options"]
+    if "aliases" in legacy:  # only hammer's old parser read aliases
+        assert {name: sorted(names) for name, names in aliases.items()} == legacy["aliases"]
+
+
+HAMMER_ALIASES = """\
+Usage:
+    hammer host [OPTIONS] SUBCOMMAND [ARG] ...
+
+Subcommands:
+ create                        Create a host
+ delete, destroy               Delete a host
+ info, show                    Show a host
+ list, index, ls               List hosts
+
+Options:
+ -h, --help                    Print help
+"""
+
+
+def test_engine_matches_legacy_hammer_aliases():
+    """None of the corpus has aliases, so check them on a page the old parser was run on"""
+    assert process_help(plugins.load_parser("hammer")(), HAMMER_ALIASES) == (
+        ["create", "delete", "info", "list"],
+        [],
+        {"delete": ["destroy"], "info": ["show"], "list": ["index", "ls"]},
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+
+import asyncssh
+import pytest
+
+from clix import runner
+from clix.explore import CRAWLER_SCRIPT, AsyncExplorer
+from clix.transports import LocalTransport
+
+FAKE_HAMMER = """\
+#!{python}
+import sys
+
+if sys.argv[1:-1]:
+    print("Usage:\\n    hammer good [OPTIONS]\\n\\nOptions:\\n -h, --help    Print help")
+else:
+    print("Usage:\\n    hammer [OPTIONS] SUBCOMMAND [ARG] ...\\n")
+    print("Options:\\n -h, --help                    Print help\\n")
+    print("Subcommands:")
+    print(" good                          Run good")
+    print(" it's                          Run it")
+"""
+
+
+class CrawlerProcess:
+    """The remote crawler run locally, behind the parts of asyncssh's process the driver uses"""
+
+    def __init__(self, proc, command):
+        self.proc = proc
+        self.command = command
+        self.stdin = self
+        self.stdout = self
+        self.stderr = self
+
+    @property
+    def exit_status(self):
+        return self.proc.returncode
+
+    returncode = exit_status
+
+    def write(self, data):
+        self.proc.stdin.write(data.encode())
+
+    def write_eof(self):
+        self.proc.stdin.close()
+
+    async def readline(self):
+        return (await self.proc.stdout.readline()).decode()
+
+    async def read(self):
+        return (await self.proc.stderr.read()).decode()
+
+
+class SilentProcess(CrawlerProcess):
+    """A crawler that's stopped answering, without exiting"""
+
+    def __init__(self):
+        super().__init__(None, "crawler")
+
+    exit_status = returncode = None
+
+    def write(self, data):
+        pass
+
+    async def readline(self):
+        await asyncio.sleep(3600)
+
+
+@pytest.fixture
+def explorer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    hammer = tmp_path / "bin" / "hammer"
+    hammer.parent.mkdir()
+    hammer.write_text(FAKE_HAMMER.format(python=sys.executable))
+    hammer.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{hammer.parent}{os.pathsep}{os.environ['PATH']}")
+    return AsyncExplorer(
+        name="hammer", version="1.0", parser="hammer", data_dir=f"{tmp_path}/", transport="local"
+    )
+
+
+async def _drive_crawler(explorer):
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(CRAWLER_SCRIPT),
+        "--suffix=--help",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        return await asyncio.wait_for(
+            explorer._drive_remote(CrawlerProcess(proc, "crawler")), timeout=30
+        )
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+
+
+def test_unsplittable_path_is_answered(explorer):
+    """An unbalanced quote fails its own command, rather than leaving the driver waiting"""
+    nodes = runner.run(_drive_crawler(explorer))
+    assert set(nodes) == {"hammer", "hammer good", "hammer it's"}
+    assert "No closing quotation" in explorer._failed["hammer it's"]
+
+
+def test_silent_crawler_fails(explorer, monkeypatch):
+    monkeypatch.setattr(AsyncExplorer, "_crawler_silence", lambda _: 0.1)
+    with pytest.raises(asyncssh.ProcessError, match="sent nothing"):
+        runner.run(explorer._drive_remote(SilentProcess()))
+
+
+def test_local_transport_unsplittable_command():
+    result = runner.run(LocalTransport().run("hammer it's --help"))
+    assert result.exit_status != 0
+    assert "No closing quotation" in result.stderr
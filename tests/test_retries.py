@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+from clix import runner
+from clix.explore import AsyncExplorer
+from clix.transports import CommandResult
+
+
+class ScriptedTransport:
+    """Answer each run with the next step: a delay to stall for, then a result or an error"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def run(self, command):
+        self.calls += 1
+        delay, outcome = self.steps.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return CommandResult(stdout=outcome)
+
+    async def close(self):
+        pass
+
+
+def _explorer(tmp_path, *steps, **options):
+    explorer = AsyncExplorer(
+        name="hammer",
+        version="1.0",
+        parser="hammer",
+        data_dir=f"{tmp_path}/",
+        transport="local",
+        max_sessions=2,
+        **options,
+    )
+    explorer.transport = ScriptedTransport(*steps)
+    return explorer
+
+
+def test_hedge_wins_over_a_stalled_command(tmp_path):
+    explorer = _explorer(tmp_path, (10, "stalled"), (0, "hedged"), hedge=True)
+    explorer.telemetry.hedge_delay = lambda: 0.05
+    start = time.monotonic()
+    result = runner.run(explorer._run_command("hammer --help"))
+    assert result.stdout == "hedged"
+    assert time.monotonic() - start < 5  # noqa: PLR2004 - well short of the stall
+    assert explorer.telemetry.hedges == 1
+    assert explorer.transport.cancelled == 1
+
+
+def test_failed_hedge_leaves_the_primary(tmp_path):
+    steps = (0.2, "primary"), (0, OSError("Channel open failed"))
+    explorer = _explorer(tmp_path, *steps, hedge=True)
+    explorer.telemetry.hedge_delay = lambda: 0.05
+    assert runner.run(explorer._run_command("hammer --help")).stdout == "primary"
+
+
+def test_no_hedge_until_there_is_a_p95(tmp_path):
+    explorer = _explorer(tmp_path, (0.1, "primary"), hedge=True)
+    assert explorer.telemetry.hedge_delay() is None
+    assert runner.run(explorer._run_command("hammer --help")).stdout == "primary"
+    assert explorer.telemetry.hedges == 0
+
+
+def test_transient_errors_are_retried(tmp_path):
+    steps = (0, OSError("Connection reset")), (0, ConnectionResetError()), (0, "help")
+    explorer = _explorer(tmp_path, *steps, retries=2)
+    assert runner.run(explorer._run_command("hammer --help")).stdout == "help"
+    assert explorer.telemetry.retries == 2  # noqa: PLR2004 - one per failed try
+
+
+def test_retries_run_out(tmp_path):
+    steps = (0, OSError("Connection reset")), (0, OSError("Connection reset"))
+    explorer = _explorer(tmp_path, *steps, retries=1)
+    with pytest.raises(OSError, match="reset"):
+        runner.run(explorer._run_command("hammer --help"))
+    assert explorer.transport.calls == 2  # noqa: PLR2004 - the try and its retry
+    assert explorer.limiter._sema._value == explorer.max_sessions
+
+
+def test_deadline_fails_the_command(tmp_path):
+    """A command over its deadline is cancelled, retried, and then marked as failed"""
+    explorer = _explorer(tmp_path, (10, "late"), (10, "late"), timeout=0.05, retries=1)
+    explorer.journal.open()
+    sub_commands, options, help_hash = runner.run(explorer.scrape_help("hammer host"))
+    explorer.journal.close()
+    assert (sub_commands, options, help_hash) == ([], [], None)
+    assert explorer._failed == {"hammer host": "timed out after 0.05s"}
+    assert explorer.transport.cancelled == 2  # noqa: PLR2004 - both tries
+    assert explorer.limiter._sema._value == explorer.max_sessions
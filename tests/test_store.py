@@ -0,0 +1,79 @@
+from click.testing import CliRunner
+
+from clix import helpers
+from clix.commands import cli
+from clix.store import TreeStore
+
+TREE = {
+    "hammer": {
+        "options": ["verbose", "output"],
+        "sub_commands": {
+            "host": {
+                "options": ["help"],
+                "sub_commands": {
+                    "create": {"options": ["name", "build"]},
+                    "delete": {"options": ["id"], "aliases": ["destroy"]},
+                    "list": {"options": []},
+                },
+            },
+            "broken": {"error": "Unknown command"},
+            "empty": {"sub_commands": {}},
+        },
+    }
+}
+
+
+def test_store_round_trip(tmp_path):
+    """A stored tree loads back exactly, and storing a version again replaces it"""
+    with TreeStore(f"{tmp_path}/") as store:
+        store.add("hammer", "1.0", TREE, "abc")
+        assert store.load("hammer", "1.0") == TREE
+        assert store.stored_hash("hammer", "1.0") == "abc"
+        assert store.load("hammer", "2.0") is None
+
+        smaller = {"hammer": {"options": ["verbose"]}}
+        store.add("hammer", "1.0", smaller, "def")
+        assert store.load("hammer", "1.0") == smaller
+        assert store.conn.execute("SELECT count(*) FROM nodes").fetchone()[0] == 1
+
+
+def test_store_query(tmp_path):
+    with TreeStore(f"{tmp_path}/") as store:
+        store.add("hammer", "1.0", TREE)
+        store.add("hammer", "1.10", {"hammer": {"sub_commands": {"host": {"options": ["bui"]}}}})
+        assert store.query("hammer", option="--build") == [("1.0", "host create", "build")]
+        assert store.query("hammer", command="host  create") == [("1.0", "host create", None)]
+        assert store.query("hammer", command="host", option="bui*") == [("1.10", "host", "bui")]
+        assert [row[0] for row in store.query("hammer", command="host*")] == [
+            "1.10",
+            "1.0",
+            "1.0",
+            "1.0",
+            "1.0",
+        ]
+        assert store.query("sat6", option="*") == []
+
+
+def test_query_sync(tmp_path, monkeypatch):
+    """--sync stores saved versions that are missing or changed, and only those"""
+    monkeypatch.chdir(tmp_path)
+    data_dir = f"{tmp_path}/"
+    helpers.save_cli("hammer", "1.0", TREE, data_dir)
+    helpers.save_cli("hammer", "2.0", {"hammer": {"options": ["build"]}}, data_dir)
+
+    def query(*args):
+        result = CliRunner().invoke(cli, ["query", "-n", "hammer", "--data-dir", data_dir, *args])
+        assert result.exit_code == 0, result.output
+        return result.output
+
+    assert "No stored version" in query("-o", "build")
+    output = query("-o", "build", "--sync")
+    assert "Stored 2 version(s)" in output
+    assert "hammer host create" in output
+    assert "Stored 0 version(s)" in query("-o", "build", "--sync")
+
+    helpers.save_cli("hammer", "2.0", {"hammer": {"options": ["rebuild"]}}, data_dir)
+    assert "Stored 1 version(s)" in query("-o", "rebuild", "--sync")
+    with TreeStore(data_dir) as store:
+        assert store.load("hammer", "1.0") == TREE
+        assert store.query("hammer", option="build") == [("1.0", "host create", "build")]